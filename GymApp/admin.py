@@ -1,5 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db import transaction
+from . import notifications
 from .models import User, MemberProfile, Schedule, Review, Progress, Payment, Package, MemberPackage, Notification, Chat, ChatParticipant, Message
 
 #AdminUser và MemberProfile
@@ -115,6 +117,17 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ('title', 'message', 'user__username')
     date_hierarchy = 'sent_at'
 
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            notifications.on_deleted([obj])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            deleted = list(queryset.only('pk', 'user_id', 'is_read'))
+            super().delete_queryset(request, queryset)
+            notifications.on_deleted(deleted)
+
 
 @admin.register(Chat)
 class ChatAdmin(admin.ModelAdmin):
@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Max, Count
+
+from .models import MemberProfile
+
+# Phân tích Progress theo dạng vector: nạp các cột của mọi hội viên vào mảng NumPy
+# (sắp theo user, recorded_at) rồi tính theo nhóm bằng cumsum/reduceat, không lặp từng dòng.
+
+METRICS = ('weight', 'body_fat', 'muscle_mass')
+SECONDS_PER_DAY = 86400.0
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _to_float(values):
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+
+def _round(value, digits=3):
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def _group_bounds(user_ids):
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    ends = np.r_[starts[1:], len(user_ids)]
+    return starts, ends
+
+
+def rolling_mean(values, group_start, window):
+    """Trung bình trượt theo nhóm, bỏ qua NaN; group_start[i] là chỉ số đầu nhóm của dòng i."""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0))
+    counts = np.cumsum(valid)
+    idx = np.arange(len(values))
+    lo = np.maximum(idx - window + 1, group_start)
+    prev_sums = np.where(lo > 0, sums[lo - 1], 0.0)
+    prev_counts = np.where(lo > 0, counts[lo - 1], 0)
+    n = counts - prev_counts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(n > 0, (sums - prev_sums) / n, np.nan)
+
+
+def rate_of_change(values, days, first_in_group):
+    """Tốc độ thay đổi mỗi ngày giữa hai lần đo liên tiếp; dòng đầu mỗi nhóm là NaN."""
+    rate = np.full(len(values), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate[1:] = np.diff(values) / np.diff(days)
+    rate[first_in_group] = np.nan
+    rate[~np.isfinite(rate)] = np.nan
+    return rate
+
+
+def linear_trend(values, days, starts):
+    """Hồi quy tuyến tính theo nhóm (bình phương tối thiểu) bằng reduceat; trả về (slope, intercept)."""
+    valid = ~np.isnan(values)
+    v = np.where(valid, values, 0.0)
+    t = np.where(valid, days, 0.0)
+    n = np.add.reduceat(valid.astype(np.float64), starts)
+    st = np.add.reduceat(t, starts)
+    sv = np.add.reduceat(v, starts)
+    stt = np.add.reduceat(t * t, starts)
+    stv = np.add.reduceat(t * v, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denom = n * stt - st * st
+        slope = np.where((n >= 2) & (denom != 0), (n * stv - st * sv) / denom, np.nan)
+        intercept = np.where(n >= 1, (sv - slope * st) / n, np.nan)
+    return slope, intercept
+
+
+def compute(rows, heights, window=7, horizon_days=30, target_weight=None):
+    """rows: (user_id, recorded_at, weight, body_fat, muscle_mass) đã sắp theo user_id, recorded_at."""
+    if not rows:
+        return {}
+    user_ids, recorded_at, *metric_columns = zip(*rows)
+    user_ids = np.array(user_ids, dtype=np.int64)
+    origin = recorded_at[0]
+    days = np.array([(r - origin).total_seconds() for r in recorded_at]) / SECONDS_PER_DAY
+    metrics = {name: _to_float(column) for name, column in zip(METRICS, metric_columns)}
+
+    starts, ends = _group_bounds(user_ids)
+    sizes = ends - starts
+    group_start = np.repeat(starts, sizes)
+    first_in_group = np.zeros(len(user_ids), dtype=bool)
+    first_in_group[starts] = True
+
+    height_m = np.array([heights.get(int(u)) or np.nan for u in user_ids], dtype=np.float64) / 100.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        series = {'bmi': metrics['weight'] / (height_m ** 2)}
+    trends = {}
+    for name, values in metrics.items():
+        series[name] = values
+        series[f'{name}_avg'] = rolling_mean(values, group_start, window)
+        series[f'{name}_rate'] = rate_of_change(values, days, first_in_group)
+        trends[name] = linear_trend(values, days, starts)
+
+    results = {}
+    for g, (start, end) in enumerate(zip(starts, ends)):
+        member = int(user_ids[start])
+        last_day = days[end - 1]
+        points = [
+            {'recorded_at': recorded_at[i], **{key: _round(col[i]) for key, col in series.items()}}
+            for i in range(start, end)
+        ]
+        trend = {}
+        projection = {'horizon_days': horizon_days,
+                      'date': recorded_at[end - 1] + timedelta(days=horizon_days)}
+        for name in METRICS:
+            slope, intercept = trends[name][0][g], trends[name][1][g]
+            trend[name] = {'slope_per_day': _round(slope, 4), 'slope_per_week': _round(slope * 7, 4)}
+            projection[name] = _round(intercept + slope * (last_day + horizon_days), 2)
+
+        if target_weight is not None:
+            slope, intercept = trends['weight'][0][g], trends['weight'][1][g]
+            current = intercept + slope * last_day
+            days_needed = (target_weight - current) / slope if slope and np.isfinite(slope) else np.nan
+            projection['target_weight'] = target_weight
+            if np.isfinite(days_needed) and days_needed >= 0:
+                projection['days_to_target'] = _round(days_needed, 1)
+                projection['target_date'] = recorded_at[end - 1] + timedelta(days=float(days_needed))
+            else:
+                projection['days_to_target'] = None
+                projection['target_date'] = None
+
+        results[member] = {
+            'member': member,
+            'last_recorded_at': recorded_at[end - 1],
+            'trend': trend,
+            'projection': projection,
+            'points': points,
+        }
+    return results
+
+
+def member_analytics(queryset, scope, window=7, horizon_days=30, target_weight=None):
+    """Kết quả phân tích cho từng hội viên trong queryset.
+
+    Cache theo (scope, member, recorded_at cuối); updated_at cuối và số bản ghi cũng nằm
+    trong key để việc sửa hoặc xóa một bản ghi cũ làm mất hiệu lực cache, chiều cao (dùng tính BMI)
+    cũng vậy để sửa MemberProfile.height có hiệu lực ngay.
+    """
+    latest = {member: (last, updated, total) for member, last, updated, total in
+              queryset.order_by().values('user_id')
+              .annotate(last=Max('recorded_at'), updated=Max('updated_at'), total=Count('id'))
+              .values_list('user_id', 'last', 'updated', 'total')}
+    heights = dict(MemberProfile.objects.filter(user_id__in=latest).values_list('user_id', 'height'))
+    keys = {member: f'analytics:progress:{scope}:{member}:{last.timestamp()}:{updated.timestamp()}:{total}:'
+                    f'{heights.get(member)}:{window}:{horizon_days}:{target_weight}'
+            for member, (last, updated, total) in latest.items()}
+    cached = cache.get_many(keys.values())
+    results = {member: cached[key] for member, key in keys.items() if key in cached}
+
+    missing = [member for member in latest if member not in results]
+    if missing:
+        rows = list(queryset.filter(user_id__in=missing).order_by('user_id', 'recorded_at', 'id')
+                    .values_list('user_id', 'recorded_at', *METRICS))
+        computed = compute(rows, heights, window, horizon_days, target_weight)
+        cache.set_many({keys[member]: data for member, data in computed.items()}, CACHE_TIMEOUT)
+        results.update(computed)
+
+    return [results[member] for member in sorted(results)]
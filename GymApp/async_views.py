@@ -0,0 +1,96 @@
+from functools import wraps
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import chats, routers
+from .authentication import CachedOAuth2Authentication, aresolve_token
+from .models import Message
+from .serializers import MessageSerializer
+from .views import PtProfileViewSet, PackageViewSet, NotificationViewSet, ChatViewSet, history_params
+
+# Bản async (dưới /async/...) của các endpoint đọc nhiều nhất. Queryset, quyền, serializer, phân trang
+# và cache catalog dùng lại đúng viewset sync nên kết quả giống hệt; chỉ phần I/O (token, cache, truy vấn)
+# được await nên dưới ASGI request đang chờ MySQL không chiếm một thread của worker.
+# Chỉ trả JSON (không có trang browsable API).
+
+
+async def _authenticate(request):
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header[:7].lower() == 'bearer ' and header[7:].strip():
+        return await aresolve_token(header[7:].strip())
+    return None
+
+
+def async_action(viewset, action):
+    """View Django async chạy handler(view, request, **kwargs) của một action GET,
+    xác thực/kiểm tra quyền/xử lý lỗi/render như APIView.dispatch."""
+
+    def decorator(handler):
+        @wraps(handler)
+        async def view_func(django_request, **kwargs):
+            authenticator = CachedOAuth2Authentication()
+            request = Request(django_request, authenticators=[authenticator])
+            request.accepted_renderer, request.accepted_media_type = JSONRenderer(), 'application/json'
+            view = viewset(request=request, action=action, args=(), kwargs=kwargs, format_kwarg=None,
+                           headers={'Vary': 'Accept'})
+            try:
+                if django_request.method != 'GET':
+                    raise exceptions.MethodNotAllowed(django_request.method)
+                resolved = await _authenticate(django_request)
+                request._authenticator = authenticator if resolved else None
+                request.user, request.auth = resolved or (AnonymousUser(), None)
+                view.check_permissions(request)
+                replica_token = None
+                if isinstance(view, routers.ReplicaReadMixin) and action in view.replica_actions \
+                        and await routers.ashould_use_replica(request.user, getattr(view, 'catalog', None)):
+                    replica_token = routers.use_replica()
+                try:
+                    response = await handler(view, request, **kwargs)
+                finally:
+                    if replica_token is not None:
+                        routers.release(replica_token)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+            response = view.finalize_response(request, response)
+            # 304 từ cache catalog là HttpResponse thường, không cần render
+            return response.render() if isinstance(response, Response) else response
+
+        return view_func
+
+    return decorator
+
+
+async def _list(view, request):
+    # Như ListModelMixin.list, phân trang bằng apaginate_queryset (GymApp/paginators.py)
+    queryset = view.filter_queryset(view.get_queryset())
+    page = await view.paginator.apaginate_queryset(queryset, request, view=view)
+    return view.paginator.get_paginated_response(view.get_serializer(page, many=True).data)
+
+
+@async_action(PtProfileViewSet, 'list')
+async def pt_profiles(view, request):
+    return await view._acached_response(lambda request: _list(view, request), request)
+
+
+@async_action(PackageViewSet, 'list')
+async def packages(view, request):
+    return await view._acached_response(lambda request: _list(view, request), request)
+
+
+@async_action(NotificationViewSet, 'list')
+async def notification_list(view, request):
+    return await _list(view, request)
+
+
+@async_action(ChatViewSet, 'messages')
+async def chat_messages(view, request, pk):
+    if not await view.get_queryset().filter(pk=pk).aexists():
+        raise Http404
+    messages, has_more = await chats.amessage_history(Message.objects.filter(chat_id=pk).select_related('sender'),
+                                                      **history_params(request.query_params))
+    return Response({'results': MessageSerializer(messages, many=True).data, 'has_more': has_more})
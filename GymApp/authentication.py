@@ -0,0 +1,156 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+from oauth2_provider.contrib.rest_framework import OAuth2Authentication
+from oauth2_provider.models import get_access_token_model
+from oauth2_provider.settings import oauth2_settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import hashing
+
+# Cache kết quả xác thực access token: key là sha256 của token (không lưu token gốc làm key),
+# giá trị là các cột của user/token trừ password và token gốc; khi đọc dựng lại object bằng from_db,
+# hai cột đó bị defer và chỉ nạp từ DB nếu có code cần tới. TTL không vượt quá thời hạn còn lại của token
+# và ACCESS_TOKEN_EXPIRE_SECONDS; signal xóa key khi token bị thu hồi hoặc user thay đổi.
+# LocMemCache là cache riêng từng process nên signal chỉ xóa được ở worker xử lý nó: khi đó TTL
+# bị giới hạn ở AUTH_TOKEN_LOCAL_CACHE_SECONDS để token bị thu hồi không còn dùng được lâu ở worker khác.
+
+AccessToken = get_access_token_model()
+User = get_user_model()
+USER_FIELDS = tuple(f.attname for f in User._meta.concrete_fields if f.attname != 'password')
+TOKEN_FIELDS = ('id', 'user_id', 'application_id', 'expires', 'scope')
+
+
+def token_key(token):
+    return f'auth:token:{hashlib.sha256(token.encode()).hexdigest()}'
+
+
+def forget_tokens(*tokens):
+    cache.delete_many([token_key(token) for token in tokens])
+
+
+def forget_user(user_id):
+    forget_tokens(*AccessToken.objects.filter(user_id=user_id).values_list('token', flat=True))
+
+
+def _usable(access_token):
+    return access_token is not None and access_token.user is not None and access_token.is_valid() \
+        and access_token.user.is_active
+
+
+def _cache_timeout(access_token):
+    timeout = min((access_token.expires - timezone.now()).total_seconds(), oauth2_settings.ACCESS_TOKEN_EXPIRE_SECONDS)
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        timeout = min(timeout, settings.AUTH_TOKEN_LOCAL_CACHE_SECONDS)
+    return int(timeout)
+
+
+def _dump(access_token):
+    return {'user': {f: getattr(access_token.user, f) for f in USER_FIELDS},
+            'token': {f: getattr(access_token, f) for f in TOKEN_FIELDS}}
+
+
+def _from_values(model, values):
+    fields = [f.attname for f in model._meta.concrete_fields if f.attname in values]
+    return model.from_db(DEFAULT_DB_ALIAS, fields, [values[f] for f in fields])
+
+
+def _load(data, token):
+    access_token = _from_values(AccessToken, {**data['token'], 'token': token})
+    access_token.user = _from_values(User, data['user'])
+    return access_token
+
+
+def resolve_token(token):
+    """(user, access_token) nếu token còn hạn và user còn active, ngược lại None."""
+    key = token_key(token)
+    cached = cache.get(key)
+    if cached is not None:
+        access_token = _load(cached, token)
+        if _usable(access_token):
+            return access_token.user, access_token
+        cache.delete(key)
+
+    access_token = AccessToken.objects.select_related('user').filter(token=token).first()
+    if not _usable(access_token):
+        return None
+    timeout = _cache_timeout(access_token)
+    if timeout > 0:
+        cache.set(key, _dump(access_token), timeout)
+    return access_token.user, access_token
+
+
+async def aresolve_token(token):
+    """Bản async của resolve_token cho view async (GymApp/async_views.py)."""
+    key = token_key(token)
+    cached = await cache.aget(key)
+    if cached is not None:
+        access_token = _load(cached, token)
+        if _usable(access_token):
+            return access_token.user, access_token
+        await cache.adelete(key)
+
+    access_token = await AccessToken.objects.select_related('user').filter(token=token).afirst()
+    if not _usable(access_token):
+        return None
+    timeout = _cache_timeout(access_token)
+    if timeout > 0:
+        await cache.aset(key, _dump(access_token), timeout)
+    return access_token.user, access_token
+
+
+class CachedOAuth2Authentication(OAuth2Authentication):
+    """OAuth2Authentication dùng cache cho Bearer token: request ở trạng thái ổn định không tốn câu SQL nào."""
+
+    def authenticate(self, request):
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if header[:7].lower() == 'bearer ' and header[7:].strip():
+            resolved = resolve_token(header[7:].strip())
+            if resolved is not None:
+                return resolved
+        # Token không hợp lệ hoặc gửi theo cách khác: để django-oauth-toolkit xử lý và trả lỗi chuẩn
+        result = super().authenticate(request)
+        if result is not None and not result[0].is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return result
+
+
+class PooledModelBackend(ModelBackend):
+    """ModelBackend nhưng PBKDF2 chạy trong process pool (GymApp/hashing.py), kể cả grant password của OAuth2."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Vẫn băm một lần để thời gian trả lời không lộ username có tồn tại hay không
+            hashing.make_password(password)
+            return None
+        if hashing.check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            await hashing.amake_password(password)
+            return None
+        if await hashing.acheck_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
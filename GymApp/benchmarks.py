@@ -0,0 +1,351 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import ratings
+from .models import User, MemberProfile, PtProfile, Package, MemberPackage, Payment, Schedule, Progress, Notification, \
+    NotificationCounter, Chat, ChatParticipant, Message, Comment
+
+# Bộ benchmark: sinh dữ liệu lớn (bulk_create theo chunk, id gán sẵn nên chạy được cả trên MySQL)
+# rồi đo latency, số câu SQL và bộ nhớ của mọi endpoint GET trong router, so với một baseline.
+
+VOLUMES = {'users': 100_000, 'schedules': 1_000_000, 'progress': 5_000_000, 'messages': 10_000_000}
+PREFIX = 'bench_'
+HISTORY_DAYS = 180
+PACKAGE_TYPES = {'monthly': 30, 'quarterly': 90, 'yearly': 365}
+PHRASES = ('See you at the gym', 'Great session today!', 'Can we move tomorrow?', 'Remember to stretch',
+           'How is the diet going?', 'Thanks coach', 'On my way', 'Let us add more cardio')
+
+
+@contextmanager
+def manual_timestamps(*models):
+    # Tắt auto_now/auto_now_add tạm thời để dữ liệu sinh ra có thời gian trải đều thay vì cùng một lúc
+    fields = [f for m in models for f in m._meta.concrete_fields if getattr(f, 'auto_now', False)
+              or getattr(f, 'auto_now_add', False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Seeder:
+    def __init__(self, scale=1.0, chunk_size=5000, seed=42, log=print):
+        self.volumes = {name: max(1, int(count * scale)) for name, count in VOLUMES.items()}
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+        self.log = log
+        self.now = timezone.now()
+        self.origin = self.now - timedelta(days=HISTORY_DAYS)
+
+    def insert(self, model, objects):
+        total = 0
+        objects = iter(objects)
+        started = time.monotonic()
+        while True:
+            batch = list(islice(objects, self.chunk_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.chunk_size)
+            total += len(batch)
+        self.log(f'  {model.__name__}: {total} rows in {time.monotonic() - started:.1f}s')
+        return total
+
+    def random_time(self, days=HISTORY_DAYS, future_days=0):
+        return self.origin + timedelta(seconds=self.rng.uniform(0, (days + future_days) * 86400))
+
+    def run(self):
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise ValueError('Benchmark data already exists in this database.')
+        with manual_timestamps(User, MemberProfile, Package, MemberPackage, Payment, Schedule, Progress,
+                               Notification, Chat, ChatParticipant, Message, Comment):
+            self.seed_users()
+            self.seed_memberships()
+            self.seed_schedules()
+            self.seed_progress()
+            self.seed_chats()
+            self.seed_feedback()
+
+    def seed_users(self):
+        password = make_password('benchmark')
+        users = self.volumes['users']
+        self.pt_count = max(1, users // 50)
+        self.admin_id = next_pk(User)
+        self.pt_ids = range(self.admin_id + 1, self.admin_id + 1 + self.pt_count)
+        self.member_ids = range(self.pt_ids.stop, self.admin_id + users)
+
+        def rows():
+            yield User(pk=self.admin_id, username=f'{PREFIX}admin', password=password, role='admin',
+                       is_staff=True, is_superuser=True, date_joined=self.origin, created_at=self.origin)
+            for role, ids in (('pt', self.pt_ids), ('member', self.member_ids)):
+                for pk in ids:
+                    joined = self.random_time()
+                    yield User(pk=pk, username=f'{PREFIX}{role}_{pk}', password=password, role=role,
+                               email=f'{PREFIX}{pk}@example.com', date_joined=joined, created_at=joined)
+
+        self.insert(User, rows())
+        self.insert(PtProfile, (PtProfile(id_id=pk, certification='ACE', experience_years=str(self.rng.randint(1, 15)))
+                                for pk in self.pt_ids))
+        self.insert(MemberProfile, (
+            MemberProfile(user_id=pk, height=Decimal(self.rng.randint(150, 195)),
+                          weight=Decimal(self.rng.randint(45, 110)), updated_at=self.now)
+            for pk in self.member_ids))
+
+    def pt_of(self, member_id):
+        return self.pt_ids[member_id % self.pt_count]
+
+    def seed_memberships(self):
+        first_package = next_pk(Package)
+        packages = [Package(pk=first_package + i, name=f'{PREFIX}package_{i}', price=Decimal(200000 + 50000 * i),
+                            pt_sessions=12 * (i % 4 + 1), package_type=list(PACKAGE_TYPES)[i % 3],
+                            created_by_id=self.admin_id, created_at=self.origin, updated_at=self.origin)
+                    for i in range(10)]
+        self.insert(Package, packages)
+        self.member_package_base = next_pk(MemberPackage)
+        today = timezone.localdate()
+
+        def rows():
+            for offset, member_id in enumerate(self.member_ids):
+                package = packages[member_id % len(packages)]
+                start = today - timedelta(days=self.rng.randint(0, 365))
+                end = start + timedelta(days=PACKAGE_TYPES[package.package_type])
+                created = timezone.make_aware(datetime.combine(start, datetime.min.time()))
+                yield MemberPackage(pk=self.member_package_base + offset, user_id=member_id, package=package,
+                                    start_date=start, end_date=end, remaining_sessions=package.pt_sessions,
+                                    status='active' if end >= today else 'expired',
+                                    created_at=created, updated_at=created)
+
+        self.insert(MemberPackage, rows())
+        self.insert(Payment, (
+            Payment(member_package_id=self.member_package_base + offset, amount=packages[member_id % 10].price,
+                    method=self.rng.choice(('momo', 'vnpay', 'bank')), payment_date=self.random_time(),
+                    status=self.rng.choices(('completed', 'pending', 'failed'), (90, 5, 5))[0])
+            for offset, member_id in enumerate(self.member_ids)))
+
+    def seed_schedules(self):
+        def rows():
+            for _ in range(self.volumes['schedules']):
+                offset = self.rng.randrange(len(self.member_ids))
+                member_id = self.member_ids[offset]
+                start = self.random_time(future_days=30).replace(minute=0, second=0, microsecond=0)
+                past = start < self.now
+                yield Schedule(user_id=member_id, pt_id=self.pt_of(member_id),
+                               member_package_id=self.member_package_base + offset,
+                               start_time=start, end_time=start + timedelta(hours=1),
+                               status=self.rng.choice(('completed', 'approved')) if past
+                               else self.rng.choice(('pending', 'approved')),
+                               created_at=start - timedelta(days=2), updated_at=start - timedelta(days=1))
+
+        self.insert(Schedule, rows())
+
+    def seed_progress(self):
+        def rows():
+            for _ in range(self.volumes['progress']):
+                member_id = self.rng.choice(self.member_ids)
+                recorded = self.random_time()
+                yield Progress(user_id=member_id, pt_id=self.pt_of(member_id),
+                               weight=Decimal(f'{self.rng.uniform(45, 110):.2f}'),
+                               body_fat=Decimal(f'{self.rng.uniform(8, 35):.2f}'),
+                               muscle_mass=Decimal(f'{self.rng.uniform(20, 60):.2f}'),
+                               recorded_at=recorded, updated_at=recorded)
+
+        self.insert(Progress, rows())
+
+    def seed_chats(self):
+        # Mỗi hội viên một chat 1-1 với PT của mình; tin nhắn chia đều và có timestamp tăng dần
+        chat_base = next_pk(Chat)
+        chats = len(self.member_ids)
+        self.insert(Chat, (Chat(pk=chat_base + i, last_updated=self.origin) for i in range(chats)))
+        per_chat = max(1, self.volumes['messages'] // chats)
+        step = HISTORY_DAYS * 86400 / per_chat
+        last = {}
+
+        def rows():
+            for i, member_id in enumerate(self.member_ids):
+                senders = (member_id, self.pt_of(member_id))
+                for j in range(per_chat):
+                    sent = self.origin + timedelta(seconds=j * step + self.rng.uniform(0, step / 2))
+                    message = Message(chat_id=chat_base + i, sender_id=senders[j % 2],
+                                      content=self.rng.choice(PHRASES), timestamp=sent)
+                    last[chat_base + i] = message
+                    yield message
+
+        self.insert(Message, rows())
+        updates = [Chat(pk=pk, last_message=m.content, last_message_sender_id=m.sender_id, last_message_at=m.timestamp,
+                        last_updated=m.timestamp) for pk, m in last.items()]
+        with transaction.atomic():
+            Chat.objects.bulk_update(updates, ['last_message', 'last_message_sender', 'last_message_at',
+                                               'last_updated'], batch_size=1000)
+        self.insert(ChatParticipant, (
+            ChatParticipant(chat_id=chat_base + i, user_id=user_id, joined_at=self.origin,
+                            last_activity_at=last[chat_base + i].timestamp)
+            for i, member_id in enumerate(self.member_ids) for user_id in (member_id, self.pt_of(member_id))))
+
+    def seed_feedback(self):
+        per_member = 2
+        self.insert(Notification, (
+            Notification(user_id=member_id, title='Welcome', message='Thanks for joining!', type='system',
+                         sent_at=self.random_time(), is_read=bool(n))
+            for member_id in self.member_ids for n in range(per_member)))
+        self.insert(NotificationCounter, (NotificationCounter(user_id=pk, unread=1) for pk in self.member_ids))
+        self.insert(Comment, (
+            Comment(user_id=member_id, pt_profile_id=self.pt_of(member_id), content=self.rng.choice(PHRASES),
+                    rating=Decimal(self.rng.randint(2, 10)) / 2, created_date=self.random_time(), updated_date=self.now)
+            for member_id in self.member_ids[::2]))
+        ratings.rebuild()
+
+
+# ---- Đo endpoint ----
+
+# Tham số query cho các action cần đầu vào; giới hạn theo một hội viên để không quét toàn bảng
+def endpoint_params(member, pt):
+    now = timezone.now()
+    # Báo cáo: cả năm gần nhất, khoảng gói tập được seed (seed_memberships)
+    period = {'from': (timezone.localdate() - timedelta(days=365)).isoformat(), 'to': timezone.localdate().isoformat()}
+    return {
+        'schedule-free-slots': {'pt': pt.pk, 'start': now.isoformat(), 'end': (now + timedelta(days=7)).isoformat()},
+        'progress-analytics': {'member': member.pk},
+        'progress-export': {'member': member.pk, 'output': 'csv'},
+        'report-revenue': {**period, 'group_by': 'date,package'},
+        'report-memberships': period,
+    }
+
+
+def discover_endpoints():
+    """(url name, viewset) cho mọi route GET của router, bỏ các biến thể .format và route cần tham số khác pk."""
+    from .urls import router
+    seen = {}
+    for pattern in router.urls:
+        callback = pattern.callback
+        groups = set(pattern.pattern.regex.groupindex)
+        if 'get' not in getattr(callback, 'actions', {}) or 'format' in groups or groups - {'pk'}:
+            continue
+        seen.setdefault(pattern.name, (callback.cls, 'pk' in groups))
+    return seen
+
+
+def sample_pk(viewset, user):
+    # Lấy một đối tượng mà user thấy được qua get_queryset của chính viewset
+    view = viewset(action='retrieve', kwargs={}, format_kwarg=None)
+    request = Request(APIRequestFactory().get('/'))
+    request.user = user
+    view.request = request
+    return view.get_queryset().order_by().values_list('pk', flat=True).first()
+
+
+def role_users():
+    member_id = Progress.objects.values_list('user_id', flat=True).first()
+    return {
+        'admin': User.objects.filter(is_superuser=True, is_active=True).order_by('pk').first(),
+        'pt': User.objects.filter(role='pt', is_active=True, pt_schedules__isnull=False).order_by('pk').first(),
+        'member': User.objects.filter(pk=member_id).first() if member_id else
+        User.objects.filter(role='member', is_active=True).order_by('pk').first(),
+    }
+
+
+def _request(client, url, params):
+    response = client.get(url, params)
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response.status_code, size
+
+
+def measure(client, url, params, repeats):
+    _request(client, url, params)  # warm-up: cache catalog, kết nối DB
+    timings, queries = [], 0
+    for _ in range(repeats):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            status, size = _request(client, url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = max(queries, len(ctx.captured_queries))
+    tracemalloc.start()
+    try:
+        _request(client, url, params)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    timings.sort()
+    return {
+        'status': status,
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'queries': queries,
+        'peak_kb': round(peak / 1024, 1),
+        'bytes': size,
+    }
+
+
+def run_benchmarks(roles=('admin', 'pt', 'member'), repeats=5, log=print):
+    users = role_users()
+    params = endpoint_params(users['member'], users['pt'])
+    results = {}
+    for role in roles:
+        user = users[role]
+        if user is None:
+            log(f'  skip role {role}: no such user')
+            continue
+        client = APIClient()
+        client.force_authenticate(user)
+        for name, (viewset, detail) in discover_endpoints().items():
+            kwargs = {}
+            if detail:
+                kwargs['pk'] = sample_pk(viewset, user)
+                if kwargs['pk'] is None:
+                    continue
+            key = f'{role} {name}'
+            results[key] = measure(client, reverse(name, kwargs=kwargs), params.get(name, {}), repeats)
+            log(f'  {key}: {results[key]}')
+    return results
+
+
+def compare(baseline, results, threshold=0.25, min_delta_ms=5.0):
+    """Danh sách mô tả các endpoint chậm hơn / nhiều câu SQL hơn / tốn bộ nhớ hơn baseline."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(f"{key}: queries {base['queries']} -> {current['queries']}")
+        if current['p50_ms'] > base['p50_ms'] * (1 + threshold) and current['p50_ms'] - base['p50_ms'] >= min_delta_ms:
+            regressions.append(f"{key}: p50 {base['p50_ms']}ms -> {current['p50_ms']}ms")
+        if current['peak_kb'] > base['peak_kb'] * (1 + threshold) and current['peak_kb'] - base['peak_kb'] >= 64:
+            regressions.append(f"{key}: peak memory {base['peak_kb']}KB -> {current['peak_kb']}KB")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'vendor': connection.vendor, 'created_at': timezone.now().isoformat(), 'results': results},
+                  f, indent=2, sort_keys=True)
@@ -0,0 +1,113 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+# Cache đọc xuyên (read-through) cho các endpoint catalog ít thay đổi.
+# Mỗi catalog có một "version" trong cache; signal save/delete đổi version nên
+# các key cũ tự hết hiệu lực, và ETag/Last-Modified lấy từ chính version này.
+
+PACKAGES = 'packages'
+PT_PROFILES = 'pt-profiles'
+
+
+def _version_key(catalog):
+    return f'catalog:{catalog}:version'
+
+
+def _new_version(modified=None):
+    return {'stamp': uuid.uuid4().hex, 'modified': modified or timezone.now()}
+
+
+def catalog_version(catalog):
+    version = cache.get(_version_key(catalog))
+    if version is None:
+        cache.add(_version_key(catalog), _new_version(), None)
+        version = cache.get(_version_key(catalog))
+    return version
+
+
+async def acatalog_version(catalog):
+    version = await cache.aget(_version_key(catalog))
+    if version is None:
+        await cache.aadd(_version_key(catalog), _new_version(), None)
+        version = await cache.aget(_version_key(catalog))
+    return version
+
+
+def invalidate(*catalogs, modified=None):
+    for catalog in catalogs:
+        # Last-Modified không được lùi (vd. lưu đồng thời với updated_at cũ hơn), nếu không client chỉ gửi
+        # If-Modified-Since sẽ nhận 304 cho danh sách đã đổi
+        version = _new_version(modified)
+        current = cache.get(_version_key(catalog))
+        if current is not None and current['modified'] > version['modified']:
+            version['modified'] = current['modified']
+        cache.set(_version_key(catalog), version, None)
+
+
+class CatalogCacheMixin:
+    catalog = None
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        version = catalog_version(self.catalog)
+        etag, last_modified = _validators(version)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        key = _data_key(self.catalog, version, request)
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        else:
+            response = Response(data)
+        return _with_validators(response, etag, last_modified)
+
+    async def _acached_response(self, handler, request, *args, **kwargs):
+        # Như _cached_response cho view async (GymApp/async_views.py); handler là coroutine
+        version = await acatalog_version(self.catalog)
+        etag, last_modified = _validators(version)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        key = _data_key(self.catalog, version, request)
+        data = await cache.aget(key)
+        if data is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            await cache.aset(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        else:
+            response = Response(data)
+        return _with_validators(response, etag, last_modified)
+
+
+def _validators(version):
+    return quote_etag(version['stamp']), int(version['modified'].timestamp())
+
+
+def _data_key(catalog, version, request):
+    url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    return f'catalog:{catalog}:{version["stamp"]}:{url}'
+
+
+def _with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
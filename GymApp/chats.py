@@ -0,0 +1,164 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Q, F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Chat, ChatParticipant, Message
+
+# Lịch sử tin nhắn theo keyset trên index (chat, timestamp, id): mỗi trang là một
+# range scan giới hạn, không phụ thuộc độ dài của cuộc trò chuyện.
+
+DEFAULT_HISTORY_LIMIT = 50
+MAX_HISTORY_LIMIT = 200
+
+
+def _anchor(messages, message_id):
+    timestamp = messages.filter(pk=message_id).values_list('timestamp', flat=True).first()
+    if timestamp is None:
+        raise ValidationError(f"Message {message_id} does not exist in this chat.")
+    return timestamp
+
+
+async def _aanchor(messages, message_id):
+    timestamp = await messages.filter(pk=message_id).values_list('timestamp', flat=True).afirst()
+    if timestamp is None:
+        raise ValidationError(f"Message {message_id} does not exist in this chat.")
+    return timestamp
+
+
+def _history_page(messages, before, after, since, anchor, limit):
+    if before is not None:
+        messages = messages.filter(Q(timestamp__lt=anchor) | Q(timestamp=anchor, id__lt=before)).order_by('-timestamp', '-id')
+    elif after is not None:
+        messages = messages.filter(Q(timestamp__gt=anchor) | Q(timestamp=anchor, id__gt=after)).order_by('timestamp', 'id')
+    elif since is not None:
+        messages = messages.filter(timestamp__gt=since).order_by('timestamp', 'id')
+    else:
+        messages = messages.order_by('-timestamp', '-id')
+    return messages[:limit + 1]
+
+
+def message_history(messages, before=None, after=None, since=None, limit=DEFAULT_HISTORY_LIMIT):
+    """Trả về (danh sách tin nhắn, has_more).
+
+    - before=<id>: các tin cũ hơn id, mới nhất trước (cuộn lên xem lịch sử)
+    - after=<id>: các tin mới hơn id, cũ nhất trước (đồng bộ phần còn thiếu)
+    - since=<datetime>: như after nhưng theo thời điểm đồng bộ lần cuối
+    - không tham số: trang mới nhất
+    """
+    limit = max(1, min(limit, MAX_HISTORY_LIMIT))
+    anchor_id = before if before is not None else after
+    anchor = _anchor(messages, anchor_id) if anchor_id is not None else None
+    page = list(_history_page(messages, before, after, since, anchor, limit))
+    return page[:limit], len(page) > limit
+
+
+async def amessage_history(messages, before=None, after=None, since=None, limit=DEFAULT_HISTORY_LIMIT):
+    """Bản async của message_history."""
+    limit = max(1, min(limit, MAX_HISTORY_LIMIT))
+    anchor_id = before if before is not None else after
+    anchor = await _aanchor(messages, anchor_id) if anchor_id is not None else None
+    page = [message async for message in _history_page(messages, before, after, since, anchor, limit)]
+    return page[:limit], len(page) > limit
+
+
+def record_messages(messages):
+    """Cập nhật tin nhắn cuối của chat và bộ đếm chưa đọc của thành viên cho các Message vừa lưu.
+
+    Mỗi chat tốn một UPDATE cho Chat, một cho thời điểm hoạt động và một cho mỗi người gửi khác nhau.
+    """
+    by_chat = {}
+    for message in messages:
+        by_chat.setdefault(message.chat_id, []).append(message)
+
+    for chat_id, items in by_chat.items():
+        last = max(items, key=lambda m: (m.timestamp, m.pk))
+        Chat.objects.filter(pk=chat_id).update(
+            last_message=last.content, last_message_sender_id=last.sender_id,
+            last_message_at=last.timestamp, last_updated=timezone.now())
+        ChatParticipant.objects.filter(chat_id=chat_id).update(last_activity_at=last.timestamp)
+
+        per_sender = Counter(m.sender_id for m in items)
+        for sender_id, count in per_sender.items():
+            ChatParticipant.objects.filter(chat_id=chat_id).exclude(user_id=sender_id).update(
+                unread_count=F('unread_count') + count)
+        # Người gửi coi như đã đọc tới tin nhắn của chính mình; chỉ còn chưa đọc các tin của người khác sau đó
+        for sender_id in per_sender:
+            own_last = max((m for m in items if m.sender_id == sender_id), key=lambda m: (m.timestamp, m.pk))
+            unread = sum(1 for m in items if m.sender_id != sender_id and (m.timestamp, m.pk) > (own_last.timestamp, own_last.pk))
+            ChatParticipant.objects.filter(chat_id=chat_id, user_id=sender_id).update(
+                last_read_message=own_last, unread_count=unread)
+
+
+def _after(messages, message):
+    return messages.filter(Q(timestamp__gt=message.timestamp) | Q(timestamp=message.timestamp, id__gt=message.pk))
+
+
+def _unread(chat_id, user_id, last_read=None):
+    messages = Message.objects.filter(chat_id=chat_id).exclude(sender_id=user_id)
+    return (_after(messages, last_read) if last_read is not None else messages).count()
+
+
+def mark_read(participant, message=None):
+    """Đặt con trỏ đã đọc; không truyền message nghĩa là đọc hết."""
+    messages = Message.objects.filter(chat_id=participant.chat_id)
+    with transaction.atomic():
+        # Khóa dòng trước khi đếm: record_messages cộng unread_count trên chính dòng này nên phải chờ
+        # transaction này xong, phần cộng không bị câu UPDATE bên dưới ghi đè
+        list(ChatParticipant.objects.select_for_update().filter(pk=participant.pk).values_list('pk'))
+        if message is None:
+            message = messages.order_by('-timestamp', '-id').first()
+            unread = 0
+        else:
+            unread = _unread(participant.chat_id, participant.user_id, message)
+        ChatParticipant.objects.filter(pk=participant.pk).update(last_read_message=message, unread_count=unread)
+    participant.last_read_message, participant.unread_count = message, unread
+    return participant
+
+
+def refresh_last_message(chat_id):
+    """Đặt lại tin nhắn cuối của chat theo bảng Message; trả về 1 nếu có thay đổi, ngược lại 0."""
+    last = Message.objects.filter(chat_id=chat_id).order_by('-timestamp', '-id').first()
+    values = {'last_message': last.content if last else None, 'last_message_sender_id': last.sender_id if last else None,
+              'last_message_at': last.timestamp if last else None}
+    return Chat.objects.filter(pk=chat_id).exclude(**values).update(**values)
+
+
+def refresh_unread(chat_id):
+    """Đếm lại unread_count của mọi thành viên chat theo con trỏ đã đọc; trả về số dòng đã sửa."""
+    fixed = 0
+    with transaction.atomic():
+        participants = list(ChatParticipant.objects.select_for_update().filter(chat_id=chat_id))
+        pointers = Message.objects.in_bulk({p.last_read_message_id for p in participants if p.last_read_message_id})
+        for participant in participants:
+            unread = _unread(chat_id, participant.user_id, pointers.get(participant.last_read_message_id))
+            if unread != participant.unread_count:
+                fixed += ChatParticipant.objects.filter(pk=participant.pk).update(unread_count=unread)
+    return fixed
+
+
+def delete_message(message):
+    """Xóa tin nhắn, lùi con trỏ đã đọc đang trỏ vào nó về tin trước đó rồi tính lại tin cuối và bộ đếm."""
+    messages = Message.objects.filter(chat_id=message.chat_id)
+    with transaction.atomic():
+        previous = messages.filter(Q(timestamp__lt=message.timestamp) | Q(timestamp=message.timestamp, id__lt=message.pk)) \
+            .order_by('-timestamp', '-id').first()
+        ChatParticipant.objects.filter(last_read_message=message).update(last_read_message=previous)
+        message.delete()
+        refresh_last_message(message.chat_id)
+        refresh_unread(message.chat_id)
+
+
+def rebuild():
+    """Tính lại tin nhắn cuối và bộ đếm chưa đọc của mọi chat; trả về (số chat, số thành viên) bị lệch đã sửa."""
+    chats_fixed = participants_fixed = 0
+    for chat_id in Chat.objects.values_list('pk', flat=True).iterator():
+        chats_fixed += refresh_last_message(chat_id)
+        participants_fixed += refresh_unread(chat_id)
+    return chats_fixed, participants_fixed
+
+
+def inbox(user):
+    return ChatParticipant.objects.filter(user=user).select_related('chat', 'chat__last_message_sender')
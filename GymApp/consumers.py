@@ -0,0 +1,67 @@
+import asyncio
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .models import ChatParticipant, Message
+from .realtime import chat_group, get_batcher
+
+# Số sự kiện tối đa chờ gửi cho một kết nối; client chậm hơn sẽ bị đóng (mã 4008)
+# và cần đồng bộ lại lịch sử qua REST thay vì làm phình bộ nhớ của server.
+OUTBOX_SIZE = 256
+MAX_CONTENT_LENGTH = 4000
+MAX_CLIENT_ID_LENGTH = 64
+
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.chat_id = self.scope['url_route']['kwargs']['chat_id']
+        if not self.user or not self.user.is_authenticated or not await self.is_participant():
+            await self.close(code=4003)
+            return
+
+        self.group = chat_group(self.chat_id)
+        self.outbox = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self.sender_task = asyncio.create_task(self.drain_outbox())
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+            self.sender_task.cancel()
+
+    @database_sync_to_async
+    def is_participant(self):
+        return ChatParticipant.objects.filter(chat_id=self.chat_id, user=self.user).exists()
+
+    async def receive_json(self, content, **kwargs):
+        text = (content.get('content') or '').strip()
+        if not text or len(text) > MAX_CONTENT_LENGTH:
+            await self.send_json({'error': f'content must be 1-{MAX_CONTENT_LENGTH} characters.'})
+            return
+        client_id = content.get('client_id')
+        if client_id is not None and (not isinstance(client_id, (str, int)) or len(str(client_id)) > MAX_CLIENT_ID_LENGTH):
+            await self.send_json({'error': f'client_id must be a string or number of at most {MAX_CLIENT_ID_LENGTH} characters.'})
+            return
+        message = Message(chat_id=self.chat_id, sender=self.user, content=text)
+        # Ghi DB theo lô; tin nhắn được phát tới group sau khi lô được commit, lỗi thì nhận sự kiện chat.error
+        await get_batcher().submit(message, self.channel_name, client_id)
+
+    async def chat_message(self, event):
+        await self.enqueue({'type': 'message', 'message': event['message'], 'client_id': event.get('client_id')})
+
+    async def chat_error(self, event):
+        await self.enqueue({'type': 'error', 'error': event['error'], 'client_ids': event['client_ids'],
+                            'count': event['count']})
+
+    async def enqueue(self, frame):
+        try:
+            self.outbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            await self.close(code=4008)
+
+    async def drain_outbox(self):
+        while True:
+            await self.send_json(await self.outbox.get())
@@ -0,0 +1,121 @@
+import csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow là tùy chọn, chỉ cần cho định dạng parquet
+    pa = pq = None
+
+# Xuất lịch sử Progress dạng stream: đọc theo từng chunk khóa chính (keyset) nên
+# bộ nhớ không tăng theo số dòng. Không dùng trực tiếp .iterator() trên toàn bộ
+# queryset vì mysqlclient vẫn nạp hết kết quả vào bộ nhớ phía client.
+
+CHUNK_SIZE = 2000
+PROGRESS_COLUMNS = ('id', 'user_id', 'user__username', 'pt_id', 'weight', 'body_fat', 'muscle_mass',
+                    'note', 'recorded_at')
+PROGRESS_HEADER = ('id', 'user_id', 'username', 'pt_id', 'weight', 'body_fat', 'muscle_mass', 'note', 'recorded_at')
+CONTENT_TYPES = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+
+def available_formats():
+    return ('csv', 'parquet') if pa is not None else ('csv',)
+
+
+def filter_progress(queryset, member=None, pt=None, start=None, end=None):
+    if member:
+        queryset = queryset.filter(user_id=member)
+    if pt:
+        queryset = queryset.filter(pt_id=pt)
+    if start:
+        queryset = queryset.filter(recorded_at__gte=start)
+    if end:
+        queryset = queryset.filter(recorded_at__lt=end)
+    return queryset
+
+
+def iter_chunks(queryset, chunk_size=CHUNK_SIZE):
+    rows = queryset.order_by('pk').values_list(*PROGRESS_COLUMNS)
+    last_pk = 0
+    while True:
+        chunk = list(rows.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1][0]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(PROGRESS_HEADER)
+    for chunk in iter_chunks(queryset, chunk_size):
+        yield ''.join(writer.writerow(row) for row in chunk)
+
+
+class _ChunkSink:
+    # File-like tối thiểu cho ParquetWriter: giữ vị trí ghi để footer đúng offset
+    # trong khi các byte đã ghi được lấy ra (drain) và gửi đi sau mỗi row group.
+    closed = False
+
+    def __init__(self):
+        self.position = 0
+        self.buffer = []
+
+    def write(self, data):
+        self.buffer.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.buffer)
+        self.buffer = []
+        return data
+
+
+def parquet_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('user_id', pa.int64()),
+        ('username', pa.string()),
+        ('pt_id', pa.int64()),
+        ('weight', pa.decimal128(5, 2)),
+        ('body_fat', pa.decimal128(5, 2)),
+        ('muscle_mass', pa.decimal128(5, 2)),
+        ('note', pa.string()),
+        ('recorded_at', pa.timestamp('us', tz='UTC')),
+    ])
+
+
+def stream_parquet(queryset, chunk_size=CHUNK_SIZE):
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in iter_chunks(queryset, chunk_size):
+            # Mỗi chunk là một row group, chuyển sang dạng cột trước khi ghi
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_progress(queryset, output, chunk_size=CHUNK_SIZE):
+    if output == 'parquet':
+        return stream_parquet(queryset, chunk_size)
+    return stream_csv(queryset, chunk_size)
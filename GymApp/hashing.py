@@ -0,0 +1,136 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework.exceptions import APIException
+
+# Băm/kiểm tra mật khẩu (PBKDF2) trong một process pool giới hạn thay vì trên thread của request.
+# PASSWORD_HASH_WORKERS là số process chạy song song, PASSWORD_HASH_QUEUE_SIZE là số yêu cầu được
+# xếp hàng thêm; khi hàng đợi đầy quá PASSWORD_HASH_QUEUE_TIMEOUT giây thì báo HashingBusy
+# để request trả 503 sớm thay vì làm nghẽn toàn bộ worker web.
+# PASSWORD_HASH_WORKERS = 0 thì băm ngay trong process hiện tại như Django mặc định.
+
+
+class HashingBusy(APIException):
+    status_code = 503
+    default_detail = 'Server is busy, please retry shortly.'
+    default_code = 'hashing_busy'
+
+
+def create_pool(workers):
+    # spawn: không fork process đang giữ kết nối DB/thread; mỗi worker tự django.setup()
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=django.setup)
+
+
+class HashingService:
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size) if workers else None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # Tạo pool khi dùng lần đầu (sau khi gunicorn đã fork worker)
+        with self._lock:
+            if self._pool is None:
+                self._pool = create_pool(self.workers)
+            return self._pool
+
+    def _reset(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, func, *args):
+        pool = self._executor()
+        try:
+            future = pool.submit(func, *args)
+        except BrokenProcessPool:
+            # Một process con bị kill (OOM, ...): dựng lại pool cho lần sau
+            self._reset(pool)
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusy()
+        try:
+            future = self._submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        return future.result()
+
+    async def arun(self, func, *args):
+        if not self.workers:
+            return await asyncio.to_thread(func, *args)
+        # Thử lấy chỗ không chặn trước; chỉ khi hàng đợi đầy mới chờ ở thread phụ để không chặn event loop
+        if not self._slots.acquire(blocking=False):
+            if not await asyncio.to_thread(self._slots.acquire, timeout=self.timeout):
+                raise HashingBusy()
+        try:
+            future = self._submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+service = HashingService(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE,
+                         settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+
+
+def make_password(raw_password):
+    return service.run(hashers.make_password, raw_password)
+
+
+def verify_password(raw_password, encoded):
+    """(đúng mật khẩu, cần băm lại theo hasher/số vòng hiện tại) giống hashers.verify_password."""
+    return service.run(hashers.verify_password, raw_password, encoded)
+
+
+async def amake_password(raw_password):
+    return await service.arun(hashers.make_password, raw_password)
+
+
+async def averify_password(raw_password, encoded):
+    return await service.arun(hashers.verify_password, raw_password, encoded)
+
+
+def set_password(user, raw_password):
+    # Như AbstractBaseUser.set_password nhưng băm trong pool
+    user.password = make_password(raw_password)
+    user._password = raw_password
+
+
+def check_password(user, raw_password):
+    valid, must_update = verify_password(raw_password, user.password)
+    if valid and must_update:
+        user.password = make_password(raw_password)
+        user.save(update_fields=['password'])
+    return valid
+
+
+async def acheck_password(user, raw_password):
+    valid, must_update = await averify_password(raw_password, user.password)
+    if valid and must_update:
+        user.password = await amake_password(raw_password)
+        await user.asave(update_fields=['password'])
+    return valid
@@ -0,0 +1,244 @@
+import csv
+import time
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import hashing, reporting
+from .models import User, MemberProfile, Package, MemberPackage, Progress, ImportJob
+
+# Import hàng loạt từ CSV: đọc file theo chunk, kiểm tra cả chunk bằng vài truy vấn IN,
+# băm mật khẩu song song trong process pool rồi ghi bằng bulk_create. Mỗi chunk ghi dữ liệu
+# và checkpoint (ImportJob.rows_done) trong cùng một transaction nên chạy lại không bị trùng.
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 200
+
+
+def clean_field(model, name, value):
+    """Chuyển và kiểm tra một giá trị chuỗi theo field của model (kiểu, null, validators)."""
+    field = model._meta.get_field(name)
+    value = value.strip() if value else ''
+    if value == '' and field.null:
+        return None
+    return field.clean(value, None)
+
+
+class RowError(Exception):
+    pass
+
+
+class BaseImporter:
+    required_columns = ()
+
+    def __init__(self, job, chunk_size=CHUNK_SIZE):
+        self.job = job
+        self.chunk_size = chunk_size
+
+    def run(self, progress=None):
+        job = self.job
+        job.status = 'running'
+        job.save(update_fields=['status', 'updated_at'])
+        started, done_at_start = time.monotonic(), job.rows_done
+        try:
+            with open(job.source, newline='', encoding='utf-8-sig') as f:
+                reader = csv.DictReader(f)
+                missing = set(self.required_columns) - set(reader.fieldnames or ())
+                if missing:
+                    raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+                self.prepare()
+                # Bỏ qua các dòng đã ghi ở lần chạy trước (checkpoint)
+                rows = enumerate(islice(reader, job.rows_done, None), start=job.rows_done + 2)
+                while True:
+                    chunk = list(islice(rows, self.chunk_size))
+                    if not chunk:
+                        break
+                    valid, errors = self.validate(chunk)
+                    with transaction.atomic():
+                        imported = self.write(valid) if valid else 0
+                        job.rows_done += len(chunk)
+                        job.rows_imported += imported
+                        job.rows_failed += len(errors)
+                        job.errors = (job.errors + errors)[:MAX_ERRORS]
+                        job.rows_per_sec = round((job.rows_done - done_at_start) / max(time.monotonic() - started, 1e-6), 1)
+                        job.save()
+                    if progress:
+                        progress.update(job.rows_done)
+        except Exception as exc:
+            self.close()
+            job.status = 'failed'
+            job.errors = (job.errors + [{'line': None, 'error': str(exc)}])[:MAX_ERRORS + 1]
+            job.save(update_fields=['status', 'errors', 'updated_at'])
+            raise
+        self.close()
+        job.status = 'completed'
+        job.save(update_fields=['status', 'updated_at'])
+        return job
+
+    def prepare(self):
+        pass
+
+    def close(self):
+        pass
+
+    def validate(self, chunk):
+        """Trả về (các dòng hợp lệ đã chuyển kiểu, danh sách lỗi {line, error})."""
+        valid, errors = [], []
+        context = self.load_context([row for _, row in chunk])
+        for line, row in chunk:
+            try:
+                valid.append(self.clean(row, context))
+            except (RowError, ValidationError, ValueError) as exc:
+                message = '; '.join(exc.messages) if isinstance(exc, ValidationError) else str(exc)
+                errors.append({'line': line, 'error': message})
+        return valid, errors
+
+    def load_context(self, rows):
+        return {}
+
+    def clean(self, row, context):
+        raise NotImplementedError
+
+    def write(self, rows):
+        raise NotImplementedError
+
+
+class MemberImporter(BaseImporter):
+    """username, password, email, first_name, last_name, phone, height, weight, goal, package, start_date."""
+    required_columns = ('username', 'password')
+
+    def prepare(self):
+        # Gói tập ít nên nạp một lần, tra theo id hoặc tên
+        packages = list(Package.objects.all())
+        self.packages = {str(p.pk): p for p in packages}
+        self.packages.update({p.name.lower(): p for p in packages})
+        # Pool riêng cho cả lần chạy để import không chiếm hàng đợi băm mật khẩu của đăng nhập/đăng ký
+        self.pool = hashing.create_pool(settings.IMPORT_HASH_WORKERS)
+
+    def close(self):
+        if getattr(self, 'pool', None) is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def load_context(self, rows):
+        usernames = [row.get('username', '').strip() for row in rows]
+        phones = [row.get('phone', '').strip() for row in rows if row.get('phone', '').strip()]
+        return {
+            'usernames': set(User.objects.filter(username__in=usernames).values_list('username', flat=True)),
+            'phones': set(User.objects.filter(phone__in=phones).values_list('phone', flat=True)),
+        }
+
+    def clean(self, row, context):
+        username = clean_field(User, 'username', row['username'])
+        if username in context['usernames']:
+            raise RowError(f"Username '{username}' already exists.")
+        phone = clean_field(User, 'phone', row.get('phone'))
+        if phone and phone in context['phones']:
+            raise RowError(f"Phone '{phone}' already exists.")
+        if not row['password']:
+            raise RowError('Password is required.')
+        email = clean_field(User, 'email', row.get('email')) or ''
+        profile = MemberProfile(height=clean_field(MemberProfile, 'height', row.get('height')),
+                                weight=clean_field(MemberProfile, 'weight', row.get('weight')),
+                                goal=(row.get('goal') or '').strip() or None)
+
+        package, start_date = None, None
+        if (row.get('package') or '').strip():
+            package = self.packages.get(row['package'].strip().lower())
+            if package is None:
+                raise RowError(f"Unknown package '{row['package']}'.")
+            start_date = parse_date((row.get('start_date') or '').strip()) or timezone.localdate()
+
+        # Chỉ ghi nhận khi dòng đã hợp lệ để các dòng trùng phía sau trong cùng chunk bị loại,
+        # còn dòng bị loại thì không giữ chỗ username/phone cho bản sửa lại phía sau
+        context['usernames'].add(username)
+        if phone:
+            context['phones'].add(phone)
+        return {
+            'user': User(username=username, password=row['password'], role='member', phone=phone, email=email,
+                         first_name=(row.get('first_name') or '').strip(), last_name=(row.get('last_name') or '').strip()),
+            'profile': profile,
+            'package': package,
+            'start_date': start_date,
+        }
+
+    def write(self, rows):
+        users = [row['user'] for row in rows]
+        hashes = self.pool.map(make_password, [u.password for u in users], chunksize=max(1, len(users) // 32))
+        for user, hashed in zip(users, hashes):
+            user.password = hashed
+        User.objects.bulk_create(users)
+        # MySQL không trả id sau bulk_create nên đọc lại theo username
+        ids = dict(User.objects.filter(username__in=[u.username for u in users]).values_list('username', 'pk'))
+
+        profiles, member_packages = [], []
+        today = timezone.localdate()
+        for row in rows:
+            user_id = ids[row['user'].username]
+            profile = row['profile']
+            profile.user_id = user_id
+            profile.bmi = profile.calculate_bmi()  # Tính BMI ngay tại đây thay vì qua MemberProfile.save()
+            profiles.append(profile)
+            package = row['package']
+            if package is not None:
+                end_date = MemberPackage.end_date_for(package, row['start_date']) or row['start_date']
+                member_packages.append(MemberPackage(
+                    user_id=user_id, package=package, start_date=row['start_date'], end_date=end_date,
+                    remaining_sessions=package.pt_sessions, status='expired' if end_date < today else 'active'))
+        MemberProfile.objects.bulk_create(profiles)
+        MemberPackage.objects.bulk_create(member_packages)
+        reporting.record_new_memberships(member_packages)
+        return len(users)
+
+
+class ProgressImporter(BaseImporter):
+    """username, pt, recorded_at, weight, body_fat, muscle_mass, note."""
+    required_columns = ('username', 'recorded_at')
+
+    def load_context(self, rows):
+        members = {row.get('username', '').strip() for row in rows}
+        pts = {row.get('pt', '').strip() for row in rows if row.get('pt', '').strip()}
+        return {
+            'members': dict(User.objects.filter(username__in=members, role='member').values_list('username', 'pk')),
+            'pts': dict(User.objects.filter(username__in=pts, role='pt').values_list('username', 'pk')),
+        }
+
+    def clean(self, row, context):
+        user_id = context['members'].get(row['username'].strip())
+        if user_id is None:
+            raise RowError(f"Unknown member '{row['username']}'.")
+        pt_id = None
+        if (row.get('pt') or '').strip():
+            pt_id = context['pts'].get(row['pt'].strip())
+            if pt_id is None:
+                raise RowError(f"Unknown PT '{row['pt']}'.")
+        value = row['recorded_at'].strip()
+        recorded_at = parse_datetime(value) or (
+            datetime.combine(parse_date(value), datetime.min.time()) if parse_date(value) else None)
+        if recorded_at is None:
+            raise RowError(f"Invalid recorded_at '{value}'.")
+        if timezone.is_naive(recorded_at):
+            recorded_at = timezone.make_aware(recorded_at)
+        return Progress(user_id=user_id, pt_id=pt_id, recorded_at=recorded_at,
+                        weight=clean_field(Progress, 'weight', row.get('weight')),
+                        body_fat=clean_field(Progress, 'body_fat', row.get('body_fat')),
+                        muscle_mass=clean_field(Progress, 'muscle_mass', row.get('muscle_mass')),
+                        note=(row.get('note') or '').strip() or None)
+
+    def write(self, rows):
+        Progress.objects.bulk_create(rows)
+        return len(rows)
+
+
+IMPORTERS = {'members': MemberImporter, 'progress': ProgressImporter}
+
+
+def run_job(job_id, chunk_size=CHUNK_SIZE, progress=None):
+    job = ImportJob.objects.get(pk=job_id)
+    return IMPORTERS[job.kind](job, chunk_size).run(progress)
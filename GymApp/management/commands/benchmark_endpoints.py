@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from GymApp import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Đo latency, số câu SQL và bộ nhớ của mọi endpoint GET trong router; so sánh với baseline đã lưu.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmark_baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true', help='Ghi kết quả lần chạy này làm baseline.')
+        parser.add_argument('--repeats', type=int, default=5)
+        parser.add_argument('--roles', nargs='+', default=['admin', 'pt', 'member'], choices=['admin', 'pt', 'member'])
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Tỉ lệ chậm hơn/tốn bộ nhớ hơn baseline được chấp nhận (0.25 = 25%%).')
+        parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                            help='Bỏ qua chênh lệch latency nhỏ hơn ngần này (nhiễu đo).')
+
+    def handle(self, *args, **options):
+        results = benchmarks.run_benchmarks(options['roles'], options['repeats'], log=self.stdout.write)
+        errors = [f'{key}: HTTP {r["status"]}' for key, r in results.items() if r['status'] >= 500]
+
+        if options['save_baseline']:
+            benchmarks.save_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f'Saved baseline for {len(results)} endpoint(s) to {options["baseline"]}'))
+        elif os.path.exists(options['baseline']):
+            regressions = benchmarks.compare(benchmarks.load_baseline(options['baseline']), results,
+                                             options['threshold'], options['min_delta_ms'])
+            errors += regressions
+        else:
+            self.stdout.write(self.style.WARNING(f'No baseline at {options["baseline"]}; run with --save-baseline first.'))
+
+        if errors:
+            for error in errors:
+                self.stdout.write(self.style.ERROR(f'REGRESSION {error}'))
+            raise CommandError(f'{len(errors)} endpoint regression(s).')
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} endpoint(s) within thresholds.'))
@@ -0,0 +1,53 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from GymApp import hashing
+from GymApp.models import User
+
+USERNAME = 'bench_hashing_user'
+PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = 'Đo số lượt đăng ký (băm mật khẩu) và đăng nhập (authenticate) mỗi giây, băm tại chỗ so với process pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[0, os.cpu_count() or 1],
+                            help='Số process băm cần đo; 0 = băm ngay trên thread gọi (như trước).')
+        parser.add_argument('--concurrency', type=int, default=8, help='Số thread gửi yêu cầu đồng thời (như số thread web).')
+        parser.add_argument('--requests', type=int, default=64, help='Số lượt mỗi phép đo.')
+        parser.add_argument('--queue-size', type=int, default=32)
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count() or 1
+        user, _ = User.objects.update_or_create(username=USERNAME, defaults={'password': make_password(PASSWORD),
+                                                                               'role': 'member', 'is_active': True})
+        default_service = hashing.service
+        try:
+            self.stdout.write(f'{cores} core(s), {options["concurrency"]} client thread(s), {options["requests"]} request(s)')
+            for workers in options['workers']:
+                hashing.service = hashing.HashingService(workers, options['queue_size'], timeout=60)
+                # Lượt đầu khởi động process con (spawn + django.setup), không tính vào kết quả
+                hashing.make_password(PASSWORD)
+                for label, func in (('sign-up', lambda i: hashing.make_password(f'{PASSWORD}-{i}')),
+                                    ('login', lambda i: authenticate(username=USERNAME, password=PASSWORD))):
+                    rate = self.measure(func, options['requests'], options['concurrency'])
+                    self.stdout.write(f'  workers={workers:<3} {label:<8} {rate:8.1f} req/s  {rate / cores:8.1f} req/s/core')
+                hashing.service.shutdown()
+        finally:
+            hashing.service = default_service
+            user.delete()
+
+    def measure(self, func, requests, concurrency):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            results = list(clients.map(func, range(requests)))
+        elapsed = time.perf_counter() - started
+        if not all(results):
+            self.stderr.write(self.style.ERROR('Some requests failed.'))
+        return requests / elapsed
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from GymApp.models import Schedule, Progress, Notification, Message, MemberPackage, SearchToken
+
+
+# Các truy vấn nóng của get_queryset theo vai trò và index tương ứng phải được dùng.
+# Phần tử thứ 4 là các vendor không kiểm tra được (SQLite sinh "NOT is_read" nên không dùng index boolean).
+def hot_paths():
+    today = timezone.localdate()
+    now = timezone.now()
+    return [
+        ('schedules (pt)', Schedule.objects.filter(pt=1).order_by('start_time'), 'schedule_pt_start_idx', ()),
+        ('schedules (member)', Schedule.objects.filter(user=1).order_by('start_time'), 'schedule_user_start_idx', ()),
+        ('progress (member)', Progress.objects.filter(user=1).order_by('recorded_at'), 'progress_user_rec_idx', ()),
+        ('progress (pt)', Progress.objects.filter(pt=1).order_by('recorded_at'), 'progress_pt_rec_idx', ()),
+        ('notifications (unread)', Notification.objects.filter(user=1, is_read=False).order_by('-sent_at'),
+         'notif_user_read_sent_idx', ('sqlite',)),
+        ('notifications (all)', Notification.objects.filter(user=1).order_by('-sent_at'), 'notif_user_sent_idx', ()),
+        ('messages (history)', Message.objects.filter(chat=1).order_by('-timestamp', '-id'),
+         'message_chat_ts_id_idx', ()),
+        ('member packages (overdue)', MemberPackage.objects.filter(status='active', end_date__lt=today),
+         'mpkg_status_end_idx', ()),
+        ('schedules (reminders due)', Schedule.objects.filter(
+            status='approved', start_time__gt=now, start_time__lte=now + timedelta(hours=1)).order_by('start_time'),
+         'schedule_status_start_idx', ()),
+        ('search (messages)', SearchToken.objects.filter(kind='message', token__in=['yoga', 'tap'], scope__in=[1, 2])
+         .values('object_id'), 'search_lookup_idx', ()),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Chạy EXPLAIN cho các truy vấn nóng và kiểm tra mỗi truy vấn dùng đúng composite index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plan', action='store_true', help='In toàn bộ query plan.')
+
+    def handle(self, *args, **options):
+        failed = []
+        for label, queryset, index_name, skip_vendors in hot_paths():
+            if connection.vendor in skip_vendors:
+                self.stdout.write(self.style.WARNING(f'SKIP  {label}: not checkable on {connection.vendor}'))
+                continue
+            plan = queryset.explain()
+            if index_name in plan:
+                self.stdout.write(self.style.SUCCESS(f'OK    {label}: {index_name}'))
+            else:
+                failed.append(label)
+                self.stdout.write(self.style.ERROR(f'MISS  {label}: expected {index_name}'))
+            if options['verbose_plan'] or index_name not in plan:
+                self.stdout.write(plan)
+
+        if failed:
+            raise CommandError(f'{len(failed)} hot path(s) do not use their index: {", ".join(failed)}')
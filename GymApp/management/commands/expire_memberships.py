@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from GymApp.tasks import expire_memberships
+
+
+class Command(BaseCommand):
+    help = 'Chuyển các gói tập quá hạn sang trạng thái expired theo từng chunk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--loop', action='store_true', help='Chạy liên tục thay vì một lần (dùng khi không có cron).')
+        parser.add_argument('--interval', type=int, default=60, help='Số giây giữa hai lần chạy khi dùng --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            total = expire_memberships(
+                chunk_size=options['chunk_size'],
+                on_progress=lambda n: self.stdout.write(f'  expired {n} so far'),
+            )
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(f'Expired {total} membership(s) in {elapsed:.2f}s'))
+
+            if not options['loop']:
+                break
+            time.sleep(max(options['interval'] - elapsed, 0))
@@ -0,0 +1,46 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from GymApp import exports
+from GymApp.models import Progress
+
+
+class Command(BaseCommand):
+    help = 'Xuất lịch sử Progress ra CSV hoặc Parquet theo dạng stream.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='csv', choices=['csv', 'parquet'])
+        parser.add_argument('--file', help='Đường dẫn file đích (mặc định: stdout, chỉ với csv).')
+        parser.add_argument('--member', type=int)
+        parser.add_argument('--pt', type=int)
+        parser.add_argument('--from', dest='start', help='ISO 8601 datetime')
+        parser.add_argument('--to', dest='end', help='ISO 8601 datetime')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if output not in exports.available_formats():
+            raise CommandError("Parquet export requires the 'pyarrow' package.")
+        if output == 'parquet' and not options['file']:
+            raise CommandError('--file is required for parquet output.')
+
+        queryset = exports.filter_progress(
+            Progress.objects.all(),
+            member=options['member'],
+            pt=options['pt'],
+            start=parse_datetime(options['start']) if options['start'] else None,
+            end=parse_datetime(options['end']) if options['end'] else None,
+        )
+        chunks = exports.stream_progress(queryset, output, options['chunk_size'])
+
+        if not options['file']:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+        mode, encoding = ('w', 'utf-8') if output == 'csv' else ('wb', None)
+        with open(options['file'], mode, encoding=encoding, newline='' if output == 'csv' else None) as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f'Wrote {options["file"]}'))
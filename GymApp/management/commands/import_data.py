@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from GymApp import importer
+from GymApp.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = 'Import hội viên hoặc chỉ số tiến độ từ file CSV theo chunk; --resume để chạy tiếp job bị lỗi.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', nargs='?', choices=list(importer.IMPORTERS))
+        parser.add_argument('path', nargs='?')
+        parser.add_argument('--chunk-size', type=int, default=importer.CHUNK_SIZE)
+        parser.add_argument('--resume', type=int, metavar='JOB_ID', help='Chạy tiếp từ checkpoint của một job đã lỗi.')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            job = ImportJob.objects.filter(pk=options['resume']).first()
+            if job is None:
+                raise CommandError(f"Import job {options['resume']} does not exist.")
+            if job.status == 'completed':
+                raise CommandError(f'Import job {job.pk} is already completed.')
+        else:
+            if not options['kind'] or not options['path']:
+                raise CommandError('Both kind and path are required unless --resume is given.')
+            if not os.path.isfile(options['path']):
+                raise CommandError(f"File not found: {options['path']}")
+            job = ImportJob.objects.create(kind=options['kind'], source=os.path.abspath(options['path']))
+
+        command = self
+
+        class Progress:
+            def update(self, done):
+                command.stdout.write(f'  {done} row(s) processed')
+
+        try:
+            job = importer.run_job(job.pk, chunk_size=options['chunk_size'], progress=Progress())
+        except Exception as exc:
+            job.refresh_from_db()
+            raise CommandError(f'Import job {job.pk} failed after {job.rows_done} row(s): {exc}. '
+                               f'Resume with --resume {job.pk}.')
+        for error in job.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"  line {error['line']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f'Job {job.pk}: {job.rows_imported} imported, {job.rows_failed} rejected, {job.rows_per_sec} rows/s'))
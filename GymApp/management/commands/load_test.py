@@ -0,0 +1,98 @@
+import asyncio
+import secrets
+import statistics
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from oauth2_provider.models import AccessToken
+
+from GymApp.models import User, ChatParticipant
+
+# Endpoint sync và bản async tương ứng (GymApp/async_views.py); {chat} là id chat của user test
+ENDPOINTS = {
+    'pt-profiles': ('/pt-profiles/', '/async/pt-profiles/'),
+    'packages': ('/packages/', '/async/packages/'),
+    'notifications': ('/notifications/', '/async/notifications/'),
+    'chat-history': ('/chats/{chat}/messages/', '/async/chats/{chat}/messages/'),
+}
+
+
+async def fetch(host, port, path, token):
+    # HTTP/1.1 tối giản bằng asyncio (không cần thư viện ngoài), mỗi request một kết nối
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write((f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n'
+                      f'Accept: application/json\r\nConnection: close\r\n\r\n').encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def run_level(host, port, path, token, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await fetch(host, port, path, token)
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Tải song song lên server đang chạy (ASGI) để so sánh endpoint sync với bản async.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--user', required=True, help='Username dùng để gọi API (cấp access token tạm).')
+        parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--duration', type=float, default=10, help='Số giây cho mỗi mức tải.')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['base_url'])
+        host, port = url.hostname, url.port or 80
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+        chat_id = ChatParticipant.objects.filter(user=user).values_list('chat_id', flat=True).first()
+        token = AccessToken.objects.create(user=user, token=secrets.token_urlsafe(32), scope='read write',
+                                           expires=timezone.now() + timedelta(hours=1))
+        try:
+            self.stdout.write(f'{"endpoint":<15}{"mode":<7}{"conc":>6}{"req/s":>10}{"p50 ms":>10}'
+                              f'{"p95 ms":>10}{"p99 ms":>10}{"errors":>8}')
+            for name in options['endpoints']:
+                if '{chat}' in ENDPOINTS[name][0] and chat_id is None:
+                    self.stderr.write(f'Skipping {name}: user has no chat.')
+                    continue
+                for concurrency in options['concurrency']:
+                    for mode, path in zip(('sync', 'async'), ENDPOINTS[name]):
+                        latencies, errors, elapsed = asyncio.run(run_level(
+                            host, port, path.format(chat=chat_id), token.token, concurrency, options['duration']))
+                        self.stdout.write(
+                            f'{name:<15}{mode:<7}{concurrency:>6}{len(latencies) / elapsed:>10.1f}'
+                            f'{percentile(latencies, 50):>10.1f}{percentile(latencies, 95):>10.1f}'
+                            f'{percentile(latencies, 99):>10.1f}{errors:>8}')
+        finally:
+            token.delete()
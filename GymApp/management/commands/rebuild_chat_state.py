@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from GymApp import chats
+
+
+class Command(BaseCommand):
+    help = 'Tính lại tin nhắn cuối của chat và bộ đếm chưa đọc của thành viên từ bảng Message để sửa các sai lệch.'
+
+    def handle(self, *args, **options):
+        chats_fixed, participants_fixed = chats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled {chats_fixed} chat(s) and {participants_fixed} participant unread count(s).'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from GymApp import ratings
+
+
+class Command(BaseCommand):
+    help = 'Tính lại điểm đánh giá của PT từ Comment/Review để sửa các sai lệch.'
+
+    def handle(self, *args, **options):
+        fixed = ratings.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {fixed} PT profile(s).'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from GymApp import reporting
+
+
+class Command(BaseCommand):
+    help = 'Tính lại bảng tổng hợp doanh thu và số gói theo ngày từ toàn bộ Payment/MemberPackage.'
+
+    def handle(self, *args, **options):
+        revenue, memberships = reporting.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {revenue} daily revenue row(s) and {memberships} daily membership row(s).'))
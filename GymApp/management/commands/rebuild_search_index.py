@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from GymApp import search
+
+
+class Command(BaseCommand):
+    help = 'Đánh chỉ mục tìm kiếm lại từ đầu cho PT, gói tập, bình luận và tin nhắn.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', nargs='+', choices=list(search.DOCUMENTS), default=list(search.DOCUMENTS))
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for kind in options['kind']:
+            started = time.monotonic()
+            total = search.rebuild(kind, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Indexed {total} {kind} object(s) in {time.monotonic() - started:.1f}s'))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from GymApp.benchmarks import Seeder, VOLUMES
+
+
+class Command(BaseCommand):
+    help = ('Sinh dữ liệu benchmark (mặc định %s) vào database hiện tại. Chỉ chạy trên database dùng riêng cho test.'
+            % ', '.join(f'{count:,} {name}' for name, count in VOLUMES.items()))
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Hệ số nhân số lượng, ví dụ 0.01 để chạy thử.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        seeder = Seeder(scale=options['scale'], chunk_size=options['chunk_size'], seed=options['seed'],
+                        log=self.stdout.write)
+        self.stdout.write(f'Seeding {seeder.volumes}')
+        try:
+            seeder.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Seeded benchmark data in {time.monotonic() - started:.1f}s'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from GymApp import reminders
+
+
+class Command(BaseCommand):
+    help = 'Gửi notification nhắc các buổi tập đã duyệt sắp diễn ra (theo SCHEDULE_REMINDER_LEADS).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Chạy liên tục thay vì một lần (dùng khi không có cron).')
+        parser.add_argument('--interval', type=int, default=60,
+                            help='Số giây tối đa giữa hai lần chạy khi dùng --loop; ngủ ít hơn nếu có nhắc đến hạn sớm hơn.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            sent = reminders.send_due_reminders(chunk_size=options['chunk_size'])
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(f'Sent {sent} reminder(s) in {elapsed:.2f}s'))
+
+            if not options['loop']:
+                break
+            # Lịch mới duyệt có thể đến hạn bất cứ lúc nào nên không ngủ quá --interval
+            wait = options['interval'] - elapsed
+            next_due = reminders.next_due_at()
+            if next_due is not None:
+                wait = min(wait, (next_due - timezone.now()).total_seconds())
+            time.sleep(max(wait, 0))
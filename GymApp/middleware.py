@@ -0,0 +1,193 @@
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from . import routers
+from .hashing import HashingBusy
+from .profiling import registry
+
+logger = logging.getLogger(__name__)
+
+
+def view_label(view_func):
+    # ViewSet: "ScheduleViewSet.list"; view thường: module.tên hàm
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return f'{view_func.__module__}.{getattr(view_func, "__name__", type(view_func).__name__)}'
+    return cls.__name__
+
+
+class RequestProfile:
+    """execute_wrapper ghi lại số câu SQL, thời gian DB và số lần lặp của từng câu SQL (đã tham số hóa)."""
+
+    def __init__(self):
+        self.view = 'unresolved'
+        self.actions = None
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.render_started = None
+        self.render_time = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.statements[sql] += 1
+
+    def resolve(self, match):
+        # Lấy view từ resolver_match sau khi request xong, thay cho hook process_view
+        # (dưới ASGI mỗi hook sync tốn một lần chuyển sang thread)
+        if match is None:
+            return
+        self.view = view_label(match.func)
+        self.actions = getattr(match.func, 'actions', None)
+        if self.actions is None and hasattr(match.func, 'cls'):
+            self.actions = {}  # APIView thường: dùng tên method làm action
+
+    def label(self, method):
+        if self.actions is None:
+            return self.view
+        return f'{self.view}.{self.actions.get(method.lower(), method.lower())}'
+
+    def start_render(self, response):
+        self.render_started = time.perf_counter()
+        response.add_post_render_callback(self.finish_render)
+        return response
+
+    def finish_render(self, response):
+        self.render_time = time.perf_counter() - self.render_started
+
+
+class ProfilingMiddleware:
+    """Lấy mẫu PROFILING_SAMPLE_RATE request và ghi số câu SQL, thời gian DB, thời gian render,
+    kích thước response và các câu SQL lặp lại (dấu hiệu N+1) theo từng view/action.
+
+    Request không được chọn mẫu chỉ tốn một lần gọi random(), nên có thể bật thường trực.
+    Chạy được cả WSGI lẫn ASGI để view async (GymApp/async_views.py) không bị đẩy sang thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self.n_plus_one_threshold = getattr(settings, 'PROFILING_N_PLUS_ONE_THRESHOLD', 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @staticmethod
+    def install(stack, profile):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(profile))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = request._profile = RequestProfile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self.install(stack, profile)
+            response = self.get_response(request)
+        self.record(request, response, profile, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = request._profile = RequestProfile()
+        started = time.perf_counter()
+        # Kết nối DB gắn với thread: cài execute_wrapper trên thread mà ORM async của request này dùng
+        stack = ExitStack()
+        await sync_to_async(self.install)(stack, profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.record(request, response, profile, time.perf_counter() - started)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Response được render sau bước này; post-render callback đo thời gian render
+        profile = getattr(request, '_profile', None)
+        if profile is not None:
+            profile.start_render(response)
+        return response
+
+    def record(self, request, response, profile, duration):
+        profile.resolve(request.resolver_match)
+        repeats = [count for count in profile.statements.values() if count > 1]
+        worst_sql, worst = profile.statements.most_common(1)[0] if profile.statements else ('', 0)
+        view = profile.label(request.method)
+        n_plus_one = worst >= self.n_plus_one_threshold
+        if n_plus_one:
+            logger.warning('Possible N+1 in %s: statement ran %d times: %.200s', view, worst, worst_sql)
+        registry.record({
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'duration': duration,
+            'queries': sum(profile.statements.values()),
+            'db_time': profile.db_time,
+            'render_time': profile.render_time,
+            'size': None if response.streaming else len(response.content),
+            'duplicates': sum(count - 1 for count in repeats),
+            'n_plus_one': n_plus_one,
+        })
+
+
+class HashingBusyMiddleware(MiddlewareMixin):
+    """Trả 503 khi hàng đợi băm mật khẩu đầy ở view không phải DRF (endpoint /o/token/ của OAuth2)."""
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingBusy):
+            response = JsonResponse({'detail': str(exception.detail)}, status=HashingBusy.status_code)
+            response['Retry-After'] = '1'
+            return response
+
+
+class ReplicaStickinessMiddleware:
+    """Sau request ghi thành công, user đọc từ primary trong REPLICA_STICKY_SECONDS (xem GymApp/routers.py)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def wrote(request, response):
+        return routers.replica_configured() and request.method not in ('GET', 'HEAD', 'OPTIONS') \
+            and response.status_code < 400
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.wrote(request, response):
+            routers.mark_written(getattr(request, 'user', None))
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.wrote(request, response):
+            # request.user có thể là user lazy từ session (cần truy vấn) nên chạy ở thread
+            await sync_to_async(routers.mark_written)(getattr(request, 'user', None))
+        return response
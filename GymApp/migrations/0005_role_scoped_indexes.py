@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0004_remove_ptprofile_user_alter_ptprofile_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='memberpackage',
+            index=models.Index(fields=['status', 'end_date'], name='mpkg_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat', 'timestamp'], name='message_chat_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'sent_at'], name='notif_user_read_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'sent_at'], name='notif_user_sent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['user', 'recorded_at'], name='progress_user_rec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['pt', 'recorded_at'], name='progress_pt_rec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['pt', 'start_time'], name='schedule_pt_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['user', 'start_time'], name='schedule_user_start_idx'),
+        ),
+    ]
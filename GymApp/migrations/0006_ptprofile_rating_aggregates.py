@@ -0,0 +1,61 @@
+from django.db import migrations, models
+
+
+def fill_null_ratings(apps, schema_editor):
+    PtProfile = apps.get_model('GymApp', 'PtProfile')
+    PtProfile.objects.filter(total_rating__isnull=True).update(total_rating=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0005_role_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_null_ratings, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ptprofile',
+            name='total_rating',
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=2),
+        ),
+        migrations.AddField(
+            model_name='ptprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ptprofile',
+            name='rating_sum',
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='ptprofile',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ptprofile',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ptprofile',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ptprofile',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ptprofile',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ptprofile',
+            index=models.Index(fields=['total_rating', 'rating_count'], name='ptprofile_rating_idx'),
+        ),
+    ]
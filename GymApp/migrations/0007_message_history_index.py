@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0006_ptprofile_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='message',
+            name='message_chat_ts_idx',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat', 'timestamp', 'id'], name='message_chat_ts_id_idx'),
+        ),
+    ]
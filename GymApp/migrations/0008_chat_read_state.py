@@ -0,0 +1,60 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_last_message(apps, schema_editor):
+    # Điền tin nhắn cuối cho các chat đã có; trạng thái đã đọc cũ không xác định nên unread_count = 0
+    Chat = apps.get_model('GymApp', 'Chat')
+    Message = apps.get_model('GymApp', 'Message')
+    ChatParticipant = apps.get_model('GymApp', 'ChatParticipant')
+    for chat in Chat.objects.iterator():
+        last = Message.objects.filter(chat=chat).order_by('-timestamp', '-id').first()
+        if last is None:
+            continue
+        Chat.objects.filter(pk=chat.pk).update(
+            last_message=last.content, last_message_sender_id=last.sender_id, last_message_at=last.timestamp)
+        ChatParticipant.objects.filter(chat=chat).update(last_activity_at=last.timestamp, last_read_message=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0007_message_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='chatparticipant',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='chatparticipant',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='GymApp.message'),
+        ),
+        migrations.AddField(
+            model_name='chatparticipant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='chatparticipant',
+            index=models.Index(fields=['user', 'last_activity_at', 'id'], name='participant_inbox_idx'),
+        ),
+        migrations.RunPython(backfill_last_message, migrations.RunPython.noop),
+    ]
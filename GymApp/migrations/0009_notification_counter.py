@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_counters(apps, schema_editor):
+    Notification = apps.get_model('GymApp', 'Notification')
+    NotificationCounter = apps.get_model('GymApp', 'NotificationCounter')
+    rows = Notification.objects.filter(is_read=False).values('user_id').annotate(unread=models.Count('id'))
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=row['user_id'], unread=row['unread']) for row in rows.iterator()],
+        batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0008_chat_read_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
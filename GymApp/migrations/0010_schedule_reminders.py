@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0009_notification_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lead_minutes', models.PositiveIntegerField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['status', 'start_time'], name='schedule_status_start_idx'),
+        ),
+        migrations.AddField(
+            model_name='schedulereminder',
+            name='schedule',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='GymApp.schedule'),
+        ),
+        migrations.AddConstraint(
+            model_name='schedulereminder',
+            constraint=models.UniqueConstraint(fields=('schedule', 'lead_minutes'), name='unique_schedule_reminder'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0010_schedule_reminders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('started', models.IntegerField(default=0)),
+                ('ended', models.IntegerField(default=0)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='+', to='GymApp.package')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'package'), name='unique_daily_membership')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('method', models.CharField(choices=[('momo', 'MoMo'), ('vnpay', 'VNPAY'), ('bank', 'Bank Transfer')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('payments', models.IntegerField(default=0)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='+', to='GymApp.package')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'method', 'package'), name='unique_daily_revenue')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0011_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('pt', 'PT profile'), ('package', 'Package'), ('comment', 'Comment'), ('message', 'Message')], max_length=10)),
+                ('token', models.CharField(max_length=32)),
+                ('scope', models.BigIntegerField(default=0)),
+                ('object_id', models.BigIntegerField()),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'token', 'scope', 'object_id', 'weight'], name='search_lookup_idx'), models.Index(fields=['kind', 'object_id'], name='search_object_idx')],
+            },
+        ),
+    ]
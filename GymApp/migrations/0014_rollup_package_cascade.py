@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0013_import_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailymembership',
+            name='package',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='GymApp.package'),
+        ),
+        migrations.AlterField(
+            model_name='dailyrevenue',
+            name='package',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='GymApp.package'),
+        ),
+    ]
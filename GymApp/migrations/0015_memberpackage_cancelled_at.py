@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:59
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_cancelled_at(apps, schema_editor):
+    # Gói đã hủy từ trước: lấy updated_at hiện tại làm thời điểm hủy (giống cách báo cáo đang tính)
+    MemberPackage = apps.get_model('GymApp', 'MemberPackage')
+    MemberPackage.objects.filter(status='cancelled').update(cancelled_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('GymApp', '0014_rollup_package_cascade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memberpackage',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_cancelled_at, migrations.RunPython.noop),
+    ]
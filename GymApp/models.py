@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -79,7 +81,7 @@ class Package(models.Model):
 
     def __str__(self):
         return self.name
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 class MemberPackage(models.Model):
     STATUS_CHOICES = (
@@ -95,29 +97,51 @@ class MemberPackage(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    cancelled_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def save(self, *args, **kwargs):
         # Tự động tính end_date khi tạo mới
         if not self.id:  # Chỉ tính khi tạo mới
-            if self.package.package_type == 'monthly':
-                self.end_date = self.start_date + timedelta(days=30)  # 1 tháng = 30 ngày
-            elif self.package.package_type == 'quarterly':
-                self.end_date = self.start_date + timedelta(days=90)  # 1 quý = 90 ngày
-            elif self.package.package_type == 'yearly':
-                self.end_date = self.start_date + timedelta(days=365)  # 1 năm = 365 ngày
+            self.end_date = self.end_date_for(self.package, self.start_date) or self.end_date
 
             # Gán remaining_sessions
             self.remaining_sessions = self.package.pt_sessions
 
         # Tự động cập nhật status
-        if self.end_date < datetime.now().date():
+        if self.end_date < timezone.localdate():
             self.status = 'expired'
 
+        # Thời điểm hủy ghi một lần khi chuyển sang 'cancelled' (báo cáo dùng, không đổi theo các lần lưu sau)
+        if self.status == 'cancelled':
+            self.cancelled_at = self.cancelled_at or timezone.now()
+        else:
+            self.cancelled_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'cancelled_at'}
+
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def end_date_for(package, start_date):
+        # Dùng chung cho save() và import hàng loạt (bulk_create không gọi save)
+        days = {'monthly': 30, 'quarterly': 90, 'yearly': 365}.get(package.package_type)  # tháng/quý/năm
+        return start_date + timedelta(days=days) if days else None
+
+    @classmethod
+    def consume_sessions(cls, pk, count=1):
+        # UPDATE ... SET remaining_sessions = remaining_sessions - count WHERE remaining_sessions >= count
+        return cls.objects.filter(pk=pk, remaining_sessions__gte=count).update(
+            remaining_sessions=F('remaining_sessions') - count, updated_at=timezone.now())
+
     def __str__(self):
         return f"{self.user.username} - {self.package.name}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'end_date'], name='mpkg_status_end_idx'),
+        ]
+
 #Models Schedules
 class Schedule(models.Model):
     STATUS_CHOICES = (
@@ -157,12 +181,18 @@ class Schedule(models.Model):
     def save(self, *args, **kwargs):
         # Kiểm tra số buổi còn lại nếu đặt lịch với PT
         if self.pt and self.member_package:
-            if self.member_package.remaining_sessions <= 0:
+            if self._state.adding and self.member_package.remaining_sessions <= 0:
                 raise ValueError("No remaining PT sessions in this package.")
             if self.status == 'approved' and self._state.adding is False:  # Chỉ giảm khi cập nhật status thành approved
-                if self.__class__.objects.get(pk=self.pk).status != 'approved':  # Kiểm tra status trước đó
-                    self.member_package.remaining_sessions -= 1
-                    self.member_package.save()
+                with transaction.atomic():
+                    # Chuyển status có điều kiện trong DB, chỉ trừ buổi khi dòng thực sự chuyển sang approved
+                    changed = self.__class__.objects.filter(pk=self.pk).exclude(status='approved').update(status='approved')
+                    if changed:
+                        if not MemberPackage.consume_sessions(self.member_package_id):
+                            raise ValueError("No remaining PT sessions in this package.")
+                        self.member_package.remaining_sessions -= 1
+                    super().save(*args, **kwargs)
+                return
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -170,6 +200,25 @@ class Schedule(models.Model):
 
     class Meta:
         ordering = ['start_time']
+        indexes = [
+            models.Index(fields=['pt', 'start_time'], name='schedule_pt_start_idx'),
+            models.Index(fields=['user', 'start_time'], name='schedule_user_start_idx'),
+            models.Index(fields=['status', 'start_time'], name='schedule_status_start_idx'),
+        ]
+
+# Nhắc lịch đã gửi: mỗi (schedule, lead_minutes) chỉ một dòng nên gửi lại sau khi restart không bị trùng
+class ScheduleReminder(models.Model):
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name='reminders')
+    lead_minutes = models.PositiveIntegerField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.schedule_id} - {self.lead_minutes}m"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['schedule', 'lead_minutes'], name='unique_schedule_reminder'),
+        ]
 
 #Models Progress
 class Progress(models.Model):
@@ -209,7 +258,7 @@ class Progress(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
     note = models.TextField(null=True, blank=True)
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    recorded_at = models.DateTimeField(default=timezone.now, editable=False)  # Như auto_now_add nhưng import được giờ cũ
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
@@ -217,6 +266,10 @@ class Progress(models.Model):
 
     class Meta:
         ordering = ['recorded_at']
+        indexes = [
+            models.Index(fields=['user', 'recorded_at'], name='progress_user_rec_idx'),
+            models.Index(fields=['pt', 'recorded_at'], name='progress_pt_rec_idx'),
+        ]
 
 #Models Reveiw
 
@@ -271,7 +324,37 @@ class Payment(models.Model):
     def __str__(self):
         return f"Payment {self.member_package} - {self.amount}"
 
-#Models notification
+#Models báo cáo: bảng tổng hợp theo ngày, cập nhật dần khi Payment/MemberPackage thay đổi (xem GymApp/reporting.py)
+class DailyRevenue(models.Model):
+    date = models.DateField()
+    method = models.CharField(max_length=10, choices=Payment.METHOD_CHOICES)
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name='+')
+    amount = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    payments = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date} {self.method} {self.package_id}: {self.amount}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'method', 'package'], name='unique_daily_revenue'),
+        ]
+
+class DailyMembership(models.Model):
+    # started/ended: số gói bắt đầu / hết hiệu lực trong ngày; số gói active tại ngày D = tổng (started - ended) tới D
+    date = models.DateField()
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name='+')
+    started = models.IntegerField(default=0)
+    ended = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date} {self.package_id}: +{self.started} -{self.ended}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'package'], name='unique_daily_membership'),
+        ]
+
 class Notification(models.Model):
     TYPE_CHOICES = (
         ('reminder', 'Reminder'),
@@ -288,11 +371,27 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.title} - {self.user.username}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'sent_at'], name='notif_user_read_sent_idx'),
+            models.Index(fields=['user', 'sent_at'], name='notif_user_sent_idx'),
+        ]
+
+# Bộ đếm notification chưa đọc, cập nhật khi ghi thay vì COUNT(*) khi đọc (xem GymApp/notifications.py)
+class NotificationCounter(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='notification_counter', primary_key=True)
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
 #Models chats
 class Chat(models.Model):
     chat_name = models.CharField(max_length=100, null=True, blank=True)  # Tên nhóm (cho nhóm chat)
     is_group = models.BooleanField(default=False)  # Phân biệt chat 1-1 và nhóm
     last_message = models.TextField(null=True, blank=True)  # Lưu tin nhắn cuối (cache)
+    last_message_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
     last_updated = models.DateTimeField(auto_now=True)  # Thời gian cập nhật
     firebase_chat_id = models.CharField(max_length=100, unique=True, null=True, blank=True)  # Liên kết với Firebase
 
@@ -303,9 +402,16 @@ class ChatParticipant(models.Model):
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='participants')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_participants')
     joined_at = models.DateTimeField(auto_now_add=True)
+    # Con trỏ đã đọc và bộ đếm chưa đọc, cập nhật khi có tin nhắn mới (xem GymApp/chats.py)
+    last_read_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    unread_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(default=timezone.now)  # Dùng để sắp xếp hộp thư
 
     class Meta:
         unique_together = ('chat', 'user')  # Đảm bảo không trùng user trong cùng chat
+        indexes = [
+            models.Index(fields=['user', 'last_activity_at', 'id'], name='participant_inbox_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} in {self.chat}"
@@ -320,13 +426,31 @@ class Message(models.Model):
     def __str__(self):
         return f"{self.sender.username}: {self.content[:50]}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['chat', 'timestamp', 'id'], name='message_chat_ts_id_idx'),
+        ]
+
 # Nguyen them
 class PtProfile(models.Model):
     id = models.OneToOneField(User, on_delete=models.CASCADE, related_name='pt_profile',primary_key=True)
     certification = models.CharField(max_length=100)
     experience_years = models.CharField(max_length=10)
     nickname = models.CharField(max_length=10, blank=True)
-    total_rating = models.DecimalField(max_digits=2, decimal_places=1, null=True, blank=True)
+    # Điểm đánh giá được cộng dồn khi Comment/Review thay đổi (xem GymApp/ratings.py)
+    total_rating = models.DecimalField(max_digits=2, decimal_places=1, default=0)  # Điểm trung bình
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['total_rating', 'rating_count'], name='ptprofile_rating_idx'),
+        ]
 
 
 class Interaction(models.Model):
@@ -347,8 +471,52 @@ class Comment(Interaction):
         return self.content
 
 
+# Chỉ mục đảo cho tìm kiếm (xem GymApp/search.py): mỗi dòng là một token của một đối tượng.
+# scope dùng để lọc quyền xem (chat_id với tin nhắn, 0 với dữ liệu công khai).
+class SearchToken(models.Model):
+    KIND_CHOICES = (
+        ('pt', 'PT profile'),
+        ('package', 'Package'),
+        ('comment', 'Comment'),
+        ('message', 'Message'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    token = models.CharField(max_length=32)
+    scope = models.BigIntegerField(default=0)
+    object_id = models.BigIntegerField()
+    weight = models.PositiveSmallIntegerField(default=1)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'token', 'scope', 'object_id', 'weight'], name='search_lookup_idx'),
+            models.Index(fields=['kind', 'object_id'], name='search_object_idx'),
+        ]
 
 
+# Job import hàng loạt (xem GymApp/importer.py); rows_done là checkpoint để chạy tiếp sau lỗi
+class ImportJob(models.Model):
+    KIND_CHOICES = (
+        ('members', 'Members'),
+        ('progress', 'Progress'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+        ('completed', 'Completed'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    source = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    rows_done = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    rows_per_sec = models.FloatField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    def __str__(self):
+        return f"{self.kind} import {self.id} ({self.status})"
 
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Case, When, Value
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter
+
+# Bộ đếm chưa đọc của mỗi user được cộng/trừ theo số dòng mà mỗi câu UPDATE/DELETE ảnh hưởng,
+# nên endpoint unread-count chỉ đọc một dòng theo khóa chính.
+
+
+def adjust_unread(user_ids, delta):
+    if not delta or not user_ids:
+        return
+    if delta > 0:
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=pk) for pk in user_ids], ignore_conflicts=True)
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + delta)
+    else:
+        # Không để bộ đếm âm (cột unsigned trên MySQL)
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=Case(
+            When(unread__gte=-delta, then=F('unread') + delta), default=Value(0)))
+
+
+def unread_count(user):
+    return NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first() or 0
+
+
+def set_read_state(user, ids, is_read):
+    with transaction.atomic():
+        changed = Notification.objects.filter(user=user, pk__in=ids, is_read=not is_read).update(is_read=is_read)
+        adjust_unread([user.pk], -changed if is_read else changed)
+    return changed
+
+
+def mark_all_read(user, before=None):
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if before is not None:
+        notifications = notifications.filter(sent_at__lt=before)
+    with transaction.atomic():
+        changed = notifications.update(is_read=True)
+        adjust_unread([user.pk], -changed)
+    return changed
+
+
+def purge(user, older_than_days):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    old = Notification.objects.filter(user=user, sent_at__lt=cutoff)
+    with transaction.atomic():
+        # Xóa phần chưa đọc trước để biết chính xác cần trừ bao nhiêu
+        unread_deleted, _ = old.filter(is_read=False).delete()
+        read_deleted, _ = old.delete()
+        adjust_unread([user.pk], -unread_deleted)
+    return unread_deleted + read_deleted
+
+
+def on_deleted(notifications):
+    """Trừ bộ đếm cho các Notification (đã tải) vừa bị xóa từng dòng, ví dụ từ API hoặc admin."""
+    per_user = {}
+    for notification in notifications:
+        if not notification.is_read:
+            per_user[notification.user_id] = per_user.get(notification.user_id, 0) + 1
+    for user_id, count in per_user.items():
+        adjust_unread([user_id], -count)
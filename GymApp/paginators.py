@@ -0,0 +1,72 @@
+from rest_framework import pagination
+
+
+class _RecordedQuerySet:
+    """Đứng thay QuerySet trong CursorPagination.paginate_queryset: ghi lại truy vấn cuối cùng
+    (order_by/filter rồi cắt lát) thay vì chạy nó, và trả về các dòng đã nạp sẵn nếu có."""
+
+    def __init__(self, queryset, state):
+        self.queryset = queryset
+        self.state = state
+
+    def order_by(self, *fields):
+        return _RecordedQuerySet(self.queryset.order_by(*fields), self.state)
+
+    def filter(self, *args, **kwargs):
+        return _RecordedQuerySet(self.queryset.filter(*args, **kwargs), self.state)
+
+    def __getitem__(self, key):
+        self.state['query'] = self.queryset[key]
+        return self.state.get('rows', [])
+
+    def __getattr__(self, name):
+        return getattr(self.queryset, name)
+
+
+# Phân trang theo cursor (keyset): trang sâu tốn chi phí như trang đầu, không dùng OFFSET
+class BaseCursorPaginator(pagination.CursorPagination):
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # CursorPagination chỉ chạy đúng một truy vấn. Lượt đầu chỉ dựng truy vấn đó, nạp nó bằng ORM async,
+        # rồi lượt hai chạy lại cùng logic (giải mã cursor, tính link) với các dòng đã nạp.
+        state = {}
+        self.paginate_queryset(_RecordedQuerySet(queryset, state), request, view)
+        if 'query' not in state:
+            return None
+        state['rows'] = [obj async for obj in state['query']]
+        return self.paginate_queryset(_RecordedQuerySet(queryset, state), request, view)
+
+
+class ScheduleCursorPaginator(BaseCursorPaginator):
+    ordering = ('start_time', 'id')
+
+
+class ProgressCursorPaginator(BaseCursorPaginator):
+    ordering = ('recorded_at', 'id')
+
+
+class NotificationCursorPaginator(BaseCursorPaginator):
+    ordering = ('-sent_at', '-id')
+
+
+class ReviewCursorPaginator(BaseCursorPaginator):
+    ordering = ('-created_at', '-id')
+
+
+class CommentCursorPaginator(BaseCursorPaginator):
+    ordering = ('-created_date', '-id')
+
+
+class MemberPackageCursorPaginator(BaseCursorPaginator):
+    ordering = ('-created_at', '-id')
+
+
+class InboxCursorPaginator(BaseCursorPaginator):
+    ordering = ('-last_activity_at', '-id')
+
+
+class PaymentCursorPaginator(BaseCursorPaginator):
+    ordering = ('-payment_date', '-id')
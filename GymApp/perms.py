@@ -2,4 +2,8 @@ from rest_framework import permissions
 
 class IsCommentOwner(permissions.IsAuthenticated):
     def has_object_permission(self, request, view, comment):
-        return super().has_permission(request, view) and request.user == comment.user
\ No newline at end of file
+        return super().has_permission(request, view) and request.user == comment.user
+
+class IsMessageSender(permissions.IsAuthenticated):
+    def has_object_permission(self, request, view, message):
+        return super().has_permission(request, view) and request.user == message.sender
@@ -0,0 +1,123 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+# Số liệu profiling theo view, giữ trong bộ nhớ của process (mỗi worker một bộ) và xuất
+# theo định dạng text của Prometheus. Histogram dùng bucket cố định nên ghi chỉ là O(log n).
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = {
+    'gym_request_duration_seconds': ('Request latency in seconds', SECONDS_BUCKETS),
+    'gym_db_queries': ('Database queries per request', QUERY_BUCKETS),
+    'gym_db_duration_seconds': ('Database time per request in seconds', SECONDS_BUCKETS),
+    'gym_render_duration_seconds': ('Response rendering (serialization) time in seconds', SECONDS_BUCKETS),
+    'gym_response_size_bytes': ('Response body size in bytes', BYTES_BUCKETS),
+}
+COUNTERS = {
+    'gym_requests_total': 'Profiled requests',
+    'gym_duplicate_queries_total': 'Queries repeating an SQL statement already run in the same request',
+    'gym_n_plus_one_total': 'Profiled requests flagged as N+1 (one statement repeated past the threshold)',
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.histograms = {name: {} for name in HISTOGRAMS}
+        self.counters = {name: defaultdict(int) for name in COUNTERS}
+
+    def record(self, sample):
+        """sample: dict gồm view, method, status, duration, queries, db_time, render_time, size, duplicates, n_plus_one."""
+        labels = (('view', sample['view']),)
+        values = {
+            'gym_request_duration_seconds': sample['duration'],
+            'gym_db_queries': sample['queries'],
+            'gym_db_duration_seconds': sample['db_time'],
+            'gym_render_duration_seconds': sample['render_time'],
+            'gym_response_size_bytes': sample['size'],
+        }
+        with self.lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                histogram = self.histograms[name].get(labels)
+                if histogram is None:
+                    histogram = self.histograms[name][labels] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+            self.counters['gym_requests_total'][labels + (('method', sample['method']), ('status', str(sample['status'])))] += 1
+            self.counters['gym_duplicate_queries_total'][labels] += sample['duplicates']
+            self.counters['gym_n_plus_one_total'][labels] += int(sample['n_plus_one'])
+
+    def snapshot(self):
+        with self.lock:
+            histograms = {
+                name: [(dict(labels), {'buckets': list(h.cumulative()), 'sum': h.sum, 'count': h.count})
+                       for labels, h in series.items()]
+                for name, series in self.histograms.items()
+            }
+            counters = {name: [(dict(labels), value) for labels, value in series.items()]
+                        for name, series in self.counters.items()}
+        return histograms, counters
+
+
+def _format_labels(labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+def render_prometheus(registry, sample_rate):
+    histograms, counters = registry.snapshot()
+    lines = ['# HELP gym_profiling_sample_rate Fraction of requests that are profiled',
+             '# TYPE gym_profiling_sample_rate gauge',
+             f'gym_profiling_sample_rate {sample_rate}']
+    for name, series in counters.items():
+        lines += [f'# HELP {name} {COUNTERS[name]}', f'# TYPE {name} counter']
+        lines += [f'{name}{_format_labels(labels)} {value}' for labels, value in series]
+    for name, series in histograms.items():
+        lines += [f'# HELP {name} {HISTOGRAMS[name][0]}', f'# TYPE {name} histogram']
+        for labels, data in series:
+            for bound, total in data['buckets']:
+                lines.append(f'{name}_bucket{_format_labels({**labels, "le": bound})} {total}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {data["sum"]:.6f}')
+            lines.append(f'{name}_count{_format_labels(labels)} {data["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def render_json(registry, sample_rate):
+    histograms, counters = registry.snapshot()
+    return {
+        'sample_rate': sample_rate,
+        'counters': {name: [{**labels, 'value': value} for labels, value in series]
+                     for name, series in counters.items()},
+        'histograms': {name: [{**labels, **data, 'buckets': [[str(b), t] for b, t in data['buckets']]}
+                              for labels, data in series]
+                       for name, series in histograms.items()},
+    }
+
+
+registry = Registry()
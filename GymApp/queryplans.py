@@ -0,0 +1,84 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+# Đọc cây serializer lồng nhau và suy ra select_related / prefetch_related tương ứng,
+# để mỗi endpoint list chỉ tốn một số query cố định thay vì N+1.
+
+def _source_path(field):
+    if field.source == '*' or not field.source:
+        return None
+    return field.source.replace('.', '__')
+
+
+def _relation(model, path):
+    # Trả về (model đích, có phải quan hệ nhiều-nhiều/ngược không) theo đường dẫn source
+    many = False
+    for name in path.split('__'):
+        try:
+            f = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None, many
+        if not f.is_relation:
+            return None, many
+        if f.many_to_many or f.one_to_many:
+            many = True
+        model = f.related_model
+    return model, many
+
+
+def _walk(serializer, model, prefix, in_prefetch, selects, prefetches):
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        path = _source_path(field)
+        if path is None:
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+        else:
+            child = field
+        if not isinstance(child, (serializers.BaseSerializer, serializers.StringRelatedField)):
+            continue
+
+        related_model, many = _relation(model, path)
+        if related_model is None:
+            continue
+        full_path = prefix + path
+
+        if many or in_prefetch:
+            prefetches.append(full_path)
+        else:
+            selects.append(full_path)
+
+        if isinstance(child, serializers.ModelSerializer):
+            _walk(child, related_model, full_path + '__', many or in_prefetch, selects, prefetches)
+
+
+@lru_cache(maxsize=None)
+def build_plan(serializer_class):
+    """Trả về (select_related, prefetch_related) cho serializer_class."""
+    selects, prefetches = [], []
+    serializer = serializer_class()
+    if isinstance(serializer, serializers.ModelSerializer):
+        _walk(serializer, serializer.Meta.model, '', False, selects, prefetches)
+    return tuple(selects), tuple(prefetches)
+
+
+def eager_load(queryset, serializer_class):
+    selects, prefetches = build_plan(serializer_class)
+    if selects:
+        queryset = queryset.select_related(*selects)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
+
+
+class EagerLoadingMixin:
+    # filter_queryset được gọi ở cả list() và get_object() nên áp dụng kế hoạch tại đây
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return eager_load(queryset, self.get_serializer_class())
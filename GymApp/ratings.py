@@ -0,0 +1,94 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import F, Case, When, Value, DecimalField, FloatField
+from django.db.models.functions import Cast, Round
+
+from . import cache
+from .models import PtProfile, Comment, Review
+
+# Điểm đánh giá của PT được cộng dồn trên PtProfile mỗi khi Comment/Review thay đổi.
+# "Đóng góp" của một dòng là (pt_profile_id, rating) hoặc None nếu dòng đó không được tính.
+
+STAR_FIELDS = {1: 'rating_1', 2: 'rating_2', 3: 'rating_3', 4: 'rating_4', 5: 'rating_5'}
+
+
+def star_of(rating):
+    star = int(Decimal(rating).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    return min(max(star, 1), 5)
+
+
+RATED_FIELDS = {Comment: {'active', 'rating', 'pt_profile_id'}, Review: {'pt_id', 'pt_rating'}}
+
+
+def contribution(instance):
+    if isinstance(instance, Comment):
+        if instance.active and instance.rating is not None and instance.pt_profile_id:
+            return instance.pt_profile_id, Decimal(instance.rating)
+    elif isinstance(instance, Review):
+        if instance.pt_id and instance.pt_rating is not None:
+            return instance.pt_id, Decimal(instance.pt_rating)
+    return None
+
+
+def _shift(pk, rating, sign):
+    star = STAR_FIELDS[star_of(rating)]
+    PtProfile.objects.filter(pk=pk).update(
+        rating_count=F('rating_count') + sign,
+        rating_sum=F('rating_sum') + sign * rating,
+        **{star: F(star) + sign},
+    )
+
+
+def _refresh_average(pk):
+    # Tách riêng vì MySQL tính các phép gán trong UPDATE từ trái sang phải
+    PtProfile.objects.filter(pk=pk).update(total_rating=Case(
+        When(rating_count__gt=0, then=Round(Cast('rating_sum', FloatField()) / F('rating_count'), 1)),
+        default=Value(0),
+        output_field=DecimalField(max_digits=2, decimal_places=1),
+    ))
+
+
+def apply_change(old, new):
+    """Cập nhật tổng điểm của PT từ đóng góp cũ sang đóng góp mới, trong một transaction."""
+    if old == new:
+        return
+    with transaction.atomic():
+        for item, sign in ((old, -1), (new, 1)):
+            if item is not None:
+                _shift(item[0], item[1], sign)
+        for pk in {item[0] for item in (old, new) if item is not None}:
+            _refresh_average(pk)
+    transaction.on_commit(lambda: cache.invalidate(cache.PT_PROFILES))
+
+
+def rebuild():
+    """Tính lại toàn bộ điểm từ Comment/Review; trả về số PtProfile bị lệch đã được sửa."""
+    totals = {}
+    comments = Comment.objects.filter(active=True, rating__isnull=False).values_list('pt_profile_id', 'rating')
+    reviews = Review.objects.filter(pt__isnull=False, pt_rating__isnull=False).values_list('pt_id', 'pt_rating')
+    for rows in (comments.iterator(), reviews.iterator()):
+        for pk, rating in rows:
+            entry = totals.setdefault(pk, {'rating_count': 0, 'rating_sum': Decimal(0),
+                                           **{f: 0 for f in STAR_FIELDS.values()}})
+            entry['rating_count'] += 1
+            entry['rating_sum'] += Decimal(rating)
+            entry[STAR_FIELDS[star_of(rating)]] += 1
+
+    fields = ['rating_count', 'rating_sum', *STAR_FIELDS.values(), 'total_rating']
+    drifted = []
+    for profile in PtProfile.objects.only(*fields).iterator():
+        entry = totals.get(profile.pk, {'rating_count': 0, 'rating_sum': Decimal(0),
+                                        **{f: 0 for f in STAR_FIELDS.values()}})
+        count = entry['rating_count']
+        entry['total_rating'] = (entry['rating_sum'] / count).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP) \
+            if count else Decimal(0)
+        if any(getattr(profile, f) != entry[f] for f in fields):
+            for f in fields:
+                setattr(profile, f, entry[f])
+            drifted.append(profile)
+
+    PtProfile.objects.bulk_update(drifted, fields, batch_size=500)
+    if drifted:
+        transaction.on_commit(lambda: cache.invalidate(cache.PT_PROFILES))
+    return len(drifted)
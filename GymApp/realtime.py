@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import weakref
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+
+from . import chats, search
+from .authentication import resolve_token
+from .models import Message
+from .serializers import MessageSerializer
+
+# Tầng realtime cho chat: channel layer (InMemory trong process, Redis khi cấu hình REDIS_URL)
+# làm pub/sub, mỗi chat là một group "chat_<id>".
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+BATCH_INTERVAL = 0.05  # giây
+
+
+def chat_group(chat_id):
+    return f'chat_{chat_id}'
+
+
+def message_event(message, client_id=None):
+    # client_id: id tạm do client gửi kèm qua WebSocket để khớp tin nhắn đã lưu với tin đang chờ
+    return {'type': 'chat.message', 'message': MessageSerializer(message).data, 'client_id': client_id}
+
+
+def publish_messages(messages):
+    """Đẩy các Message đã lưu tới mọi kết nối WebSocket của chat (dùng từ code đồng bộ)."""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    for message in messages:
+        async_to_sync(layer.group_send)(chat_group(message.chat_id), message_event(message))
+
+
+def write_messages(messages):
+    # Một transaction cho cả lô; dùng bulk_create khi DB trả về được id (MariaDB, PostgreSQL, SQLite),
+    # còn MySQL thì INSERT từng dòng nhưng vẫn chỉ commit một lần.
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            messages = Message.objects.bulk_create(messages)
+            search.index_objects('message', messages, replace=False)  # bulk_create không gửi post_save
+        else:
+            for message in messages:
+                message.save(force_insert=True)
+        chats.record_messages(messages)
+    return messages
+
+
+class MessageBatcher:
+    """Gom tin nhắn gửi qua WebSocket rồi ghi DB theo lô, sau đó mới phát cho các thành viên."""
+
+    def __init__(self, batch_size=BATCH_SIZE, interval=BATCH_INTERVAL):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pending = []
+        self.flush_task = None
+        self.lock = asyncio.Lock()
+
+    async def submit(self, message, reply_channel=None, client_id=None):
+        # Không chờ lô được ghi để consumer tiếp tục nhận tin nhắn kế tiếp;
+        # reply_channel là channel của người gửi, dùng để báo lỗi nếu lô không ghi được
+        self.pending.append((message, reply_channel, client_id))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        async with self.lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            try:
+                saved = await database_sync_to_async(write_messages)([message for message, _, _ in batch])
+            except Exception:
+                logger.exception('Failed to write a batch of %d chat messages', len(batch))
+                await self.report_failure(batch)
+                return
+
+        layer = get_channel_layer()
+        for message, (_, _, client_id) in zip(saved, batch):
+            await layer.group_send(chat_group(message.chat_id), message_event(message, client_id))
+
+    async def report_failure(self, batch):
+        # Người gửi không biết lô bị lỗi (submit không chờ ghi DB) nên gửi sự kiện lỗi tới từng kết nối
+        # kèm các client_id bị mất để client gửi lại
+        failed = defaultdict(list)
+        for _, reply_channel, client_id in batch:
+            if reply_channel:
+                failed[reply_channel].append(client_id)
+        layer = get_channel_layer()
+        for reply_channel, client_ids in failed.items():
+            await layer.send(reply_channel, {
+                'type': 'chat.error', 'error': 'Messages could not be saved, please resend.',
+                'client_ids': [client_id for client_id in client_ids if client_id is not None],
+                'count': len(client_ids),
+            })
+
+
+_batchers = weakref.WeakKeyDictionary()
+
+
+def get_batcher():
+    # Mỗi event loop một batcher (asyncio.Lock/Task gắn với loop)
+    loop = asyncio.get_running_loop()
+    if loop not in _batchers:
+        _batchers[loop] = MessageBatcher()
+    return _batchers[loop]
+
+
+@database_sync_to_async
+def get_token_user(token):
+    resolved = resolve_token(token)
+    return resolved[0] if resolved else AnonymousUser()
+
+
+class TokenAuthMiddleware:
+    """Xác thực WebSocket bằng OAuth2 access token: ?token=<token> hoặc header Authorization: Bearer."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+        if token is None:
+            headers = dict(scope.get('headers', []))
+            auth = headers.get(b'authorization', b'').decode()
+            if auth.lower().startswith('bearer '):
+                token = auth[7:]
+        scope = dict(scope, user=await get_token_user(token) if token else AnonymousUser())
+        return await self.app(scope, receive, send)
@@ -0,0 +1,85 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from . import notifications
+from .models import Schedule, ScheduleReminder, Notification
+
+# Nhắc lịch tập theo các mốc (phút trước start_time). Mỗi mốc là một "bucket" thời gian:
+# lịch approved có start_time trong (now + mốc nhỏ hơn kế tiếp, now + mốc] là đến hạn của mốc đó.
+# Truy vấn chạy trên index (status, start_time) nên chỉ đọc các lịch đang đến hạn,
+# còn bảng ScheduleReminder (unique theo schedule, lead_minutes) giúp không gửi trùng.
+
+
+def reminder_leads():
+    return sorted(set(settings.SCHEDULE_REMINDER_LEADS), reverse=True)
+
+
+def buckets(now=None):
+    """Danh sách (lead_minutes, lo, hi): lịch có lo < start_time <= hi đến hạn nhắc của mốc đó."""
+    now = now or timezone.now()
+    leads = reminder_leads()
+    return [(lead, now + timedelta(minutes=leads[i + 1] if i + 1 < len(leads) else 0), now + timedelta(minutes=lead))
+            for i, lead in enumerate(leads)]
+
+
+def due_schedules(lead, lo, hi):
+    return (Schedule.objects.filter(status='approved', start_time__gt=lo, start_time__lte=hi)
+            .exclude(reminders__lead_minutes=lead).order_by('start_time', 'pk'))
+
+
+def reminder_notification(user_id, start_time):
+    # Không ghi "còn 24h" vì lịch được duyệt muộn vẫn nhận nhắc của mốc lớn hơn
+    return Notification(
+        user_id=user_id,
+        type='reminder',
+        title='Upcoming training session',
+        message=f"Your training session starts at {timezone.localtime(start_time):%H:%M %d/%m/%Y}.",
+    )
+
+
+def _send_chunk(lead, lo, hi, chunk_size):
+    with transaction.atomic():
+        # skip_locked: nhiều worker chạy song song sẽ chia nhau các lịch thay vì chờ khóa
+        rows = list(due_schedules(lead, lo, hi).select_for_update(skip_locked=True)
+                    .values_list('pk', 'user_id', 'start_time')[:chunk_size])
+        if not rows:
+            return 0
+        ScheduleReminder.objects.bulk_create([ScheduleReminder(schedule_id=pk, lead_minutes=lead) for pk, _, _ in rows])
+        Notification.objects.bulk_create([reminder_notification(user_id, start) for _, user_id, start in rows])
+        # Gom user theo số nhắc trong chunk để mỗi nhóm chỉ tốn một câu UPDATE bộ đếm
+        per_user = Counter(user_id for _, user_id, _ in rows)
+        by_count = {}
+        for user_id, count in per_user.items():
+            by_count.setdefault(count, []).append(user_id)
+        for count, user_ids in by_count.items():
+            notifications.adjust_unread(user_ids, count)
+    return len(rows)
+
+
+def send_due_reminders(now=None, chunk_size=500):
+    """Gửi mọi nhắc lịch đang đến hạn; trả về số Notification đã tạo."""
+    total = 0
+    for lead, lo, hi in buckets(now):
+        while True:
+            sent = _send_chunk(lead, lo, hi, chunk_size)
+            total += sent
+            if sent < chunk_size:
+                break
+    return total
+
+
+def next_due_at(now=None):
+    """Thời điểm sớm nhất có nhắc lịch mới đến hạn (một MIN trên index cho mỗi mốc), hoặc None."""
+    now = now or timezone.now()
+    upcoming = []
+    for lead in reminder_leads():
+        start = Schedule.objects.filter(status='approved', start_time__gt=now + timedelta(minutes=lead)) \
+            .aggregate(first=Min('start_time'))['first']
+        if start is not None:
+            upcoming.append(start - timedelta(minutes=lead))
+    return min(upcoming, default=None)
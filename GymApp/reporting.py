@@ -0,0 +1,160 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum, Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Payment, MemberPackage, DailyRevenue, DailyMembership
+
+# Bảng tổng hợp theo ngày cho báo cáo doanh thu và số gói active.
+# Giống điểm PT (ratings.py): mỗi dòng nguồn có một "đóng góp" suy ra từ trạng thái hiện tại,
+# khi lưu/xóa thì trừ đóng góp cũ và cộng đóng góp mới, nên rebuild() và cập nhật dần luôn khớp nhau.
+
+MAX_REPORT_DAYS = 3660
+REVENUE_GROUPS = {'date': 'date', 'method': 'method', 'package': 'package_id'}
+
+PAYMENT_FIELDS = {'status', 'amount', 'method', 'payment_date', 'member_package_id'}
+MEMBERSHIP_FIELDS = {'status', 'start_date', 'end_date', 'package_id', 'cancelled_at'}
+
+
+def payment_contribution(payment):
+    """(date, method, member_package_id, amount) nếu payment đã completed, ngược lại None."""
+    if payment.status != 'completed' or payment.payment_date is None:
+        return None
+    return timezone.localdate(payment.payment_date), payment.method, payment.member_package_id, Decimal(payment.amount)
+
+
+def membership_events(member_package):
+    """Các sự kiện (date, package_id, field) của một MemberPackage theo trạng thái hiện tại."""
+    package_id = member_package.package_id
+    events = [(member_package.start_date, package_id, 'started')]
+    if member_package.status == 'expired':
+        events.append((member_package.end_date + timedelta(days=1), package_id, 'ended'))
+    elif member_package.status == 'cancelled':
+        events.append((timezone.localdate(member_package.cancelled_at), package_id, 'ended'))
+    return tuple(events)
+
+
+def _bump(model, lookup, **deltas):
+    # Tạo dòng nếu chưa có rồi cộng bằng F() để các request đồng thời không ghi đè nhau
+    model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+    model.objects.filter(**lookup).update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def apply_payment_change(old, new):
+    if old == new:
+        return
+    package_ids = dict(MemberPackage.objects.filter(pk__in={item[2] for item in (old, new) if item})
+                       .values_list('pk', 'package_id'))
+    with transaction.atomic():
+        for item, sign in ((old, -1), (new, 1)):
+            if item is not None:
+                day, method, member_package_id, amount = item
+                if member_package_id in package_ids:
+                    _bump(DailyRevenue, {'date': day, 'method': method, 'package_id': package_ids[member_package_id]},
+                          amount=sign * amount, payments=sign)
+
+
+def _apply_events(counts):
+    with transaction.atomic():
+        for (day, package_id, field), delta in counts.items():
+            if delta:
+                _bump(DailyMembership, {'date': day, 'package_id': package_id}, **{field: delta})
+
+
+def apply_membership_change(old, new):
+    counts = defaultdict(int)
+    for events, sign in ((old or (), -1), (new or (), 1)):
+        for event in events:
+            counts[event] += sign
+    _apply_events(counts)
+
+
+def record_new_memberships(member_packages):
+    """Cộng các MemberPackage vừa tạo bằng bulk_create (không có signal), gom theo ngày/gói."""
+    counts = defaultdict(int)
+    for member_package in member_packages:
+        for event in membership_events(member_package):
+            counts[event] += 1
+    _apply_events(counts)
+
+
+def record_expired(member_package_ids):
+    """Gọi sau khi job hết hạn chuyển các gói sang 'expired' bằng UPDATE hàng loạt (không có signal).
+
+    member_package_ids phải đúng là các dòng câu UPDATE đó vừa chuyển, không gồm dòng đã expired từ trước.
+    """
+    rows = (MemberPackage.objects.filter(pk__in=member_package_ids, status='expired').order_by()
+            .values('end_date', 'package_id').annotate(total=Count('id')))
+    with transaction.atomic():
+        for row in rows:
+            _bump(DailyMembership, {'date': row['end_date'] + timedelta(days=1), 'package_id': row['package_id']},
+                  ended=row['total'])
+
+
+def rebuild():
+    """Tính lại toàn bộ bảng tổng hợp từ Payment/MemberPackage; trả về (số dòng doanh thu, số dòng gói)."""
+    revenue = (Payment.objects.filter(status='completed').annotate(day=TruncDate('payment_date'))
+               .values('day', 'method', 'member_package__package_id')
+               .annotate(amount=Sum('amount'), payments=Count('id')).order_by())
+    memberships = defaultdict(lambda: {'started': 0, 'ended': 0})
+    for row in MemberPackage.objects.values('start_date', 'package_id').annotate(total=Count('id')).order_by():
+        memberships[row['start_date'], row['package_id']]['started'] += row['total']
+    expired = MemberPackage.objects.filter(status='expired').values('end_date', 'package_id') \
+        .annotate(total=Count('id')).order_by()
+    for row in expired:
+        memberships[row['end_date'] + timedelta(days=1), row['package_id']]['ended'] += row['total']
+    cancelled = MemberPackage.objects.filter(status='cancelled').annotate(day=TruncDate('cancelled_at')) \
+        .values('day', 'package_id').annotate(total=Count('id')).order_by()
+    for row in cancelled:
+        memberships[row['day'], row['package_id']]['ended'] += row['total']
+
+    with transaction.atomic():
+        DailyRevenue.objects.all().delete()
+        DailyMembership.objects.all().delete()
+        DailyRevenue.objects.bulk_create([
+            DailyRevenue(date=row['day'], method=row['method'], package_id=row['member_package__package_id'],
+                         amount=row['amount'], payments=row['payments'])
+            for row in revenue.iterator()
+        ], batch_size=1000)
+        DailyMembership.objects.bulk_create([
+            DailyMembership(date=day, package_id=package_id, **values)
+            for (day, package_id), values in memberships.items()
+        ], batch_size=1000)
+    return DailyRevenue.objects.count(), DailyMembership.objects.count()
+
+
+def revenue_report(start, end, group_by=('date',), package=None, method=None):
+    """Doanh thu trong [start, end] (tính cả hai đầu), gom theo các cột trong group_by."""
+    rows = DailyRevenue.objects.filter(date__gte=start, date__lte=end)
+    if package:
+        rows = rows.filter(package_id=package)
+    if method:
+        rows = rows.filter(method=method)
+    columns = [REVENUE_GROUPS[group] for group in group_by]
+    rows = rows.values(*columns).annotate(amount=Sum('amount'), payments=Sum('payments')) \
+        .filter(payments__gt=0).order_by(*columns)
+    return [{('package' if key == 'package_id' else key): value for key, value in row.items()} for row in rows]
+
+
+def membership_report(start, end, package=None):
+    """Số gói bắt đầu/kết thúc mỗi ngày và số gói active cuối mỗi ngày trong [start, end]."""
+    rows = DailyMembership.objects.all()
+    if package:
+        rows = rows.filter(package_id=package)
+    before = rows.filter(date__lt=start).aggregate(started=Sum('started'), ended=Sum('ended'))
+    active = (before['started'] or 0) - (before['ended'] or 0)
+    per_day = {row['date']: row for row in rows.filter(date__gte=start, date__lte=end).values('date')
+               .annotate(started=Sum('started'), ended=Sum('ended')).order_by('date')}
+
+    series = []
+    day = start
+    while day <= end:
+        row = per_day.get(day, {'started': 0, 'ended': 0})
+        active += row['started'] - row['ended']
+        series.append({'date': day, 'started': row['started'], 'ended': row['ended'], 'active': active})
+        day += timedelta(days=1)
+    return series
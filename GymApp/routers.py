@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils import timezone
+
+from .cache import catalog_version, acatalog_version
+
+# Đọc từ replica (DATABASES['replica']) chỉ ở các action đã chọn (ReplicaReadMixin.replica_actions);
+# mọi chỗ khác, kể cả job nền và command, vẫn đọc/ghi primary.
+# Không đọc replica khi: user vừa ghi trong REPLICA_STICKY_SECONDS (read-your-writes),
+# catalog của view vừa đổi (tránh cache lại dữ liệu cũ dưới version mới), hoặc replica không kết nối được.
+
+REPLICA = 'replica'
+
+logger = logging.getLogger(__name__)
+_use_replica = ContextVar('gym_use_replica', default=False)
+_health = {'ok': True, 'checked_at': float('-inf')}
+_health_lock = threading.Lock()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Trả về rõ 'default' để quan hệ lazy của object đọc từ replica không tự đi theo replica
+        return REPLICA if _use_replica.get() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replica nhận schema qua replication
+        return db == DEFAULT_DB_ALIAS
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def _sticky_key(user_id):
+    return f'db:sticky:{user_id}'
+
+
+def mark_written(user):
+    if replica_configured() and user is not None and user.is_authenticated:
+        cache.set(_sticky_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def replica_healthy():
+    """Kiểm tra kết nối replica tối đa một lần mỗi REPLICA_HEALTH_INTERVAL giây cho cả process."""
+    if time.monotonic() - _health['checked_at'] < settings.REPLICA_HEALTH_INTERVAL:
+        return _health['ok']
+    if not _health_lock.acquire(blocking=False):
+        return _health['ok']  # Thread khác đang kiểm tra
+    try:
+        connection = connections[REPLICA]
+        try:
+            connection.ensure_connection()
+            ok = connection.is_usable()
+            if not ok:
+                connection.close()
+        except DatabaseError as exc:
+            ok = False
+            logger.warning('Read replica unavailable, reading from primary: %s', exc)
+        _health.update(ok=ok, checked_at=time.monotonic())
+        return ok
+    finally:
+        _health_lock.release()
+
+
+def _recently_changed(version):
+    return (timezone.now() - version['modified']).total_seconds() < settings.REPLICA_STICKY_SECONDS
+
+
+def should_use_replica(user, catalog=None):
+    if not replica_configured():
+        return False
+    if user.is_authenticated and cache.get(_sticky_key(user.pk)):
+        return False
+    if catalog and _recently_changed(catalog_version(catalog)):
+        return False
+    return replica_healthy()
+
+
+async def ashould_use_replica(user, catalog=None):
+    if not replica_configured():
+        return False
+    if user.is_authenticated and await cache.aget(_sticky_key(user.pk)):
+        return False
+    if catalog and _recently_changed(await acatalog_version(catalog)):
+        return False
+    return await sync_to_async(replica_healthy)()
+
+
+def use_replica():
+    return _use_replica.set(True)
+
+
+def release(token):
+    _use_replica.reset(token)
+
+
+class ReplicaReadMixin:
+    # Các action chỉ đọc được phép chạy trên replica
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        # Sau xác thực: token/user luôn đọc từ primary
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and should_use_replica(request.user, getattr(self, 'catalog', None)):
+            self._replica_token = use_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            release(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,104 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import User, Schedule, MemberPackage
+
+# Một buổi tập không dài quá MAX_SESSION_LENGTH, nhờ vậy truy vấn chồng lịch chỉ quét
+# một khoảng start_time hữu hạn trên index (pt, start_time) thay vì toàn bộ lịch của PT.
+MAX_SESSION_LENGTH = timedelta(hours=4)
+MAX_FREE_SLOT_RANGE = timedelta(days=31)
+BLOCKING_STATUSES = ('pending', 'approved')
+
+
+def busy_intervals(pt, start, end, exclude_pk=None):
+    # Các lịch giao với [start, end): start_time < end và end_time > start
+    qs = Schedule.objects.filter(
+        pt=pt,
+        status__in=BLOCKING_STATUSES,
+        start_time__gte=start - MAX_SESSION_LENGTH,
+        start_time__lt=end,
+        end_time__gt=start,
+    )
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs
+
+
+def validate_window(start, end):
+    if start is None or end is None:
+        raise ValidationError("start_time and end_time are required.")
+    if end <= start:
+        raise ValidationError("end_time must be after start_time.")
+    if end - start > MAX_SESSION_LENGTH:
+        raise ValidationError(f"A session cannot be longer than {MAX_SESSION_LENGTH}.")
+
+
+def book(serializer, **save_kwargs):
+    """Lưu lịch qua serializer sau khi kiểm tra chồng lịch của PT trong cùng một transaction."""
+    instance = serializer.instance
+    data = {**serializer.validated_data, **save_kwargs}
+
+    def current(field):
+        if field in data:
+            return data[field]
+        return getattr(instance, field, None)
+
+    pt = current('pt')
+    start, end = current('start_time'), current('end_time')
+    validate_window(start, end)
+
+    with transaction.atomic():
+        if pt is not None and current('status') in BLOCKING_STATUSES + (None,):
+            # Khóa dòng User của PT để các request đặt lịch cùng PT được tuần tự hóa
+            User.objects.select_for_update().filter(pk=pt.pk).first()
+            if busy_intervals(pt, start, end, exclude_pk=getattr(instance, 'pk', None)).exists():
+                raise ValidationError("This PT already has a session in that time window.")
+        return serializer.save(**save_kwargs)
+
+
+def free_slots(pt, start, end):
+    """Các khoảng trống của PT trong [start, end), tính từ một truy vấn duy nhất."""
+    if end <= start:
+        raise ValidationError("end must be after start.")
+    if end - start > MAX_FREE_SLOT_RANGE:
+        raise ValidationError(f"Date range cannot exceed {MAX_FREE_SLOT_RANGE.days} days.")
+
+    intervals = busy_intervals(pt, start, end).order_by('start_time').values_list('start_time', 'end_time')
+
+    slots = []
+    cursor = start
+    for busy_start, busy_end in intervals:
+        if busy_start > cursor:
+            slots.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if cursor < end:
+        slots.append((cursor, end))
+    return slots
+
+
+def approve_schedules(ids, pt=None):
+    """Duyệt nhiều lịch pending trong một transaction, trừ buổi bằng UPDATE có điều kiện.
+
+    Trả về danh sách id đã được duyệt; nếu một gói không đủ buổi thì toàn bộ bị rollback.
+    """
+    with transaction.atomic():
+        qs = Schedule.objects.select_for_update().filter(pk__in=ids, status='pending')
+        if pt is not None:
+            qs = qs.filter(pt=pt)
+        rows = list(qs.values_list('pk', 'pt_id', 'member_package_id'))
+        approved = [pk for pk, _, _ in rows]
+        if not approved:
+            return []
+
+        Schedule.objects.filter(pk__in=approved).update(status='approved', updated_at=timezone.now())
+
+        # Gom theo gói để mỗi gói chỉ tốn một câu UPDATE
+        per_package = Counter(mp_id for _, pt_id, mp_id in rows if pt_id and mp_id)
+        for mp_id, count in per_package.items():
+            if not MemberPackage.consume_sessions(mp_id, count):
+                raise ValidationError({'member_package': f"Package {mp_id} does not have {count} remaining PT sessions."})
+    return approved
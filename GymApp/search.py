@@ -0,0 +1,131 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import PtProfile, Package, Comment, Message, ChatParticipant, SearchToken
+from .queryplans import eager_load
+from .serializers import PtProfileSerializer, PackageSerializer, CommentSerializer, MessageSerializer
+
+# Tìm kiếm bằng chỉ mục đảo tự quản lý (bảng SearchToken), cập nhật dần qua signal.
+# Dùng chung cho MySQL và SQLite; không dùng FULLTEXT của InnoDB vì mặc định nó bỏ các token
+# dưới 3 ký tự, trong khi nhiều âm tiết tiếng Việt chỉ có 1-2 chữ. Token được bỏ dấu nên
+# tìm "tap luyen" khớp "tập luyện".
+
+MAX_TOKEN_LENGTH = 32
+MAX_TERMS = 8
+MAX_WEIGHT = 1000
+MAX_PAGE = 20
+TOKEN_RE = re.compile(r'\w+')
+
+# kind -> (model, [(trường, trọng số)], serializer)
+DOCUMENTS = {
+    'pt': (PtProfile, [('nickname', 3), ('certification', 2)], PtProfileSerializer),
+    'package': (Package, [('name', 3), ('description', 1)], PackageSerializer),
+    'comment': (Comment, [('content', 1)], CommentSerializer),
+    'message': (Message, [('content', 1)], MessageSerializer),
+}
+KIND_OF_MODEL = {model: kind for kind, (model, _, _) in DOCUMENTS.items()}
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text.replace('đ', 'd').replace('Đ', 'D'))
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall(normalize(text or ''))]
+
+
+def is_searchable(kind, instance):
+    if kind == 'comment':
+        return instance.active
+    return True
+
+
+def scope_of(kind, instance):
+    return instance.chat_id if kind == 'message' else 0
+
+
+def document_tokens(kind, instance):
+    if not is_searchable(kind, instance):
+        return []
+    weights = Counter()
+    for field, weight in DOCUMENTS[kind][1]:
+        for token in tokenize(getattr(instance, field)):
+            weights[token] += weight
+    scope = scope_of(kind, instance)
+    return [SearchToken(kind=kind, token=token, scope=scope, object_id=instance.pk, weight=min(weight, MAX_WEIGHT))
+            for token, weight in weights.items()]
+
+
+def index_objects(kind, instances, replace=True):
+    """Ghi token cho các đối tượng; replace=False khi chắc chắn đối tượng mới tạo (bỏ qua DELETE)."""
+    with transaction.atomic():
+        if replace:
+            remove_objects(kind, [instance.pk for instance in instances])
+        SearchToken.objects.bulk_create([token for instance in instances for token in document_tokens(kind, instance)],
+                                        batch_size=2000)
+
+
+def remove_objects(kind, ids):
+    SearchToken.objects.filter(kind=kind, object_id__in=ids).delete()
+
+
+def rebuild(kind, chunk_size=2000):
+    """Đánh chỉ mục lại toàn bộ một loại đối tượng theo chunk khóa chính; trả về số đối tượng."""
+    model = DOCUMENTS[kind][0]
+    SearchToken.objects.filter(kind=kind).delete()
+    total = 0
+    last_pk = None
+    while True:
+        objects = model.objects.order_by('pk')
+        if last_pk is not None:
+            objects = objects.filter(pk__gt=last_pk)
+        chunk = list(objects[:chunk_size])
+        if not chunk:
+            return total
+        index_objects(kind, chunk, replace=False)
+        total += len(chunk)
+        last_pk = chunk[-1].pk
+
+
+def _hits(user, kind, terms, limit):
+    rows = SearchToken.objects.filter(kind=kind, token__in=terms)
+    if kind == 'message':
+        # Chỉ tìm trong các chat mà user tham gia (kể cả admin) để truy vấn luôn bị giới hạn bởi index
+        rows = rows.filter(scope__in=ChatParticipant.objects.filter(user=user).values('chat_id'))
+    rows = (rows.values('object_id').annotate(matched=Count('token', distinct=True), weight=Sum('weight'))
+            .order_by('-matched', '-weight', '-object_id')[:limit])
+    return [(row['matched'], row['weight'], kind, row['object_id']) for row in rows]
+
+
+def _hydrate(kind, ids):
+    model, _, serializer_class = DOCUMENTS[kind]
+    objects = eager_load(model.objects.filter(pk__in=ids), serializer_class)
+    if kind == 'comment':
+        objects = objects.select_related('user')
+    return {obj.pk: serializer_class(obj).data for obj in objects}
+
+
+def search(user, query, kinds=None, page=1, page_size=20):
+    """Kết quả xếp hạng theo số từ khớp rồi tổng trọng số; trả về (results, has_more)."""
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_TERMS]
+    if not terms:
+        return [], False
+    limit = page * page_size + 1
+    hits = []
+    for kind in kinds or DOCUMENTS:
+        hits += _hits(user, kind, terms, limit)
+    hits.sort(key=lambda hit: (hit[0], hit[1], hit[3]), reverse=True)
+    page_hits = hits[(page - 1) * page_size:page * page_size]
+
+    ids = {}
+    for _, _, kind, object_id in page_hits:
+        ids.setdefault(kind, []).append(object_id)
+    objects = {kind: _hydrate(kind, kind_ids) for kind, kind_ids in ids.items()}
+    results = [{'type': kind, 'matched_terms': matched, 'score': weight, 'object': objects[kind][object_id]}
+               for matched, weight, kind, object_id in page_hits if object_id in objects[kind]]
+    return results, len(hits) > page * page_size
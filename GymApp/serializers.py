@@ -1,6 +1,7 @@
 from rest_framework import serializers
+from . import hashing, tasks
 from .models import User, MemberProfile, Package, MemberPackage, Schedule, Progress, Review, Payment, Notification, \
-    Chat, ChatParticipant, Message, PtProfile, Comment
+    Chat, ChatParticipant, Message, PtProfile, Comment, ImportJob
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -14,7 +15,7 @@ class UserSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         data = validated_data.copy()
         u = User(**data)
-        u.set_password(u.password)
+        hashing.set_password(u, u.password)
         u.save()
 
         return u
@@ -88,6 +89,9 @@ class ScheduleSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'user_id', 'pt', 'pt_id', 'member_package', 'member_package_id', 'start_time', 'end_time', 'status', 'note', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
+class ScheduleBulkApproveSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+
 
 class ProgressSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
@@ -145,6 +149,38 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('sent_at', 'is_sent', 'user')
 
+class BroadcastSerializer(serializers.Serializer):
+    audience = serializers.ChoiceField(choices=tasks.AUDIENCES)
+    package_id = serializers.PrimaryKeyRelatedField(queryset=Package.objects.all(), required=False)
+    pt_id = serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(role='pt'), required=False)
+    title = serializers.CharField(max_length=100)
+    message = serializers.CharField()
+    type = serializers.ChoiceField(choices=Notification.TYPE_CHOICES)
+
+    def validate(self, attrs):
+        if attrs['audience'] == 'package' and not attrs.get('package_id'):
+            raise serializers.ValidationError({'package_id': "Required for the 'package' audience."})
+        if attrs['audience'] == 'pt_clients' and not attrs.get('pt_id'):
+            raise serializers.ValidationError({'pt_id': "Required for the 'pt_clients' audience."})
+        return attrs
+
+class NotificationMarkSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    is_read = serializers.BooleanField(default=True)
+
+class NotificationPurgeSerializer(serializers.Serializer):
+    older_than_days = serializers.IntegerField(min_value=0)
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = '__all__'
+        read_only_fields = [f.name for f in ImportJob._meta.fields]
+
+class ImportUploadSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=ImportJob.KIND_CHOICES)
+    file = serializers.FileField()
+
 class ChatParticipantSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
 
@@ -159,13 +195,52 @@ class MessageSerializer(serializers.ModelSerializer):
         model = Message
         fields = ['id', 'chat', 'sender', 'content', 'timestamp', 'firebase_message_id']
 
+    def validate_chat(self, chat):
+        # Không cho chuyển tin nhắn sang chat khác sau khi đã gửi
+        if self.instance is not None and chat.pk != self.instance.chat_id:
+            raise serializers.ValidationError("Chat cannot be changed.")
+        return chat
+
 class ChatSerializer(serializers.ModelSerializer):
+    # Tin nhắn không nhúng ở đây; lấy theo trang qua /chats/{id}/messages/
     participants = ChatParticipantSerializer(many=True, read_only=True)
-    messages = MessageSerializer(many=True, read_only=True)
+    # Thành viên khác khi tạo chat; người tạo luôn được thêm (ChatViewSet.perform_create)
+    participant_ids = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(is_active=True), many=True, write_only=True, required=False
+    )
 
     class Meta:
         model = Chat
-        fields = ['id', 'chat_name', 'is_group', 'last_message', 'last_updated', 'firebase_chat_id', 'participants', 'messages']
+        fields = ['id', 'chat_name', 'is_group', 'last_message', 'last_updated', 'firebase_chat_id', 'participants',
+                  'participant_ids']
+        read_only_fields = ['last_message', 'last_updated']
+
+    def validate(self, attrs):
+        others = {user.pk for user in attrs.get('participant_ids', [])} - {self.context['request'].user.pk}
+        if not attrs.get('is_group') and len(others) != 1:
+            raise serializers.ValidationError({'participant_ids': "A direct chat needs exactly one other participant."})
+        return attrs
+
+class InboxSerializer(serializers.ModelSerializer):
+    chat_id = serializers.IntegerField(source='chat.id', read_only=True)
+    chat_name = serializers.CharField(source='chat.chat_name', read_only=True)
+    is_group = serializers.BooleanField(source='chat.is_group', read_only=True)
+    last_message = serializers.CharField(source='chat.last_message', read_only=True)
+    last_message_sender = serializers.StringRelatedField(source='chat.last_message_sender', read_only=True)
+    last_message_at = serializers.DateTimeField(source='chat.last_message_at', read_only=True)
+
+    class Meta:
+        model = ChatParticipant
+        fields = ['chat_id', 'chat_name', 'is_group', 'last_message', 'last_message_sender', 'last_message_at',
+                  'unread_count', 'last_read_message']
+
+class ChatReadSerializer(serializers.Serializer):
+    message_id = serializers.IntegerField(required=False, allow_null=True)
+
+class ChatListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Chat
+        fields = ['id', 'chat_name', 'is_group', 'last_message', 'last_updated']
 
  # Nguyen them
 class CommentSerializer(serializers.ModelSerializer):
@@ -184,7 +259,11 @@ class CommentSerializer(serializers.ModelSerializer):
         }
 
 class PtProfileSerializer(serializers.ModelSerializer):
+    rating_histogram = serializers.SerializerMethodField()
+
+    def get_rating_histogram(self, pt_profile):
+        return {star: getattr(pt_profile, f'rating_{star}') for star in range(1, 6)}
 
     class Meta:
         model = PtProfile
-        fields = ['id','certification', 'experience_years','total_rating','nickname']
+        fields = ['id','certification', 'experience_years','total_rating','rating_count','rating_histogram','nickname']
@@ -0,0 +1,212 @@
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import cache, ratings, notifications, authentication, reporting, search
+from .models import User, Package, PtProfile, Comment, Review, Notification, Payment, MemberPackage, Message
+
+_UNKNOWN = object()
+
+
+@receiver(post_save, sender=Package)
+def invalidate_packages(sender, instance, **kwargs):
+    transaction.on_commit(lambda: cache.invalidate(cache.PACKAGES, modified=instance.updated_at))
+
+
+@receiver(post_delete, sender=Package)
+def invalidate_deleted_package(sender, instance, **kwargs):
+    # updated_at của dòng bị xóa là thời điểm cũ; thời điểm đổi danh sách là lúc xóa
+    transaction.on_commit(lambda: cache.invalidate(cache.PACKAGES))
+
+
+@receiver([post_save, post_delete], sender=PtProfile)
+def invalidate_pt_profiles(sender, instance, **kwargs):
+    transaction.on_commit(lambda: cache.invalidate(cache.PT_PROFILES))
+
+
+# Trường của User hiện trong catalog gói (created_by qua UserSerializer); bỏ qua last_login như trước
+# để đăng nhập không xóa cache. Catalog PT không hiện trường nào của User, còn xóa user thì PtProfile
+# bị xóa theo (invalidate_pt_profiles) và người tạo gói không xóa được (RESTRICT).
+CATALOG_USER_FIELDS = ('username', 'email', 'first_name', 'last_name', 'phone', 'role', 'created_at')
+
+
+def catalog_user_values(user):
+    return tuple(getattr(user, field) for field in CATALOG_USER_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def snapshot_catalog_user(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._catalog_snapshot = None
+    elif set(CATALOG_USER_FIELDS) & instance.get_deferred_fields():
+        instance._catalog_snapshot = _UNKNOWN
+    else:
+        instance._catalog_snapshot = catalog_user_values(instance)
+
+
+@receiver(pre_save, sender=User)
+def load_unknown_catalog_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & set(CATALOG_USER_FIELDS):
+        return
+    if getattr(instance, '_catalog_snapshot', _UNKNOWN) is _UNKNOWN:
+        old = sender.objects.filter(pk=instance.pk).only(*CATALOG_USER_FIELDS).first() if instance.pk else None
+        instance._catalog_snapshot = catalog_user_values(old) if old else None
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_catalogs(sender, instance, created, update_fields=None, **kwargs):
+    # Đăng ký, đổi mật khẩu, sửa hồ sơ hội viên... không đụng tới catalog nên không xóa cache
+    if created or (update_fields and not set(update_fields) & set(CATALOG_USER_FIELDS)):
+        return
+    new = catalog_user_values(instance)
+    changed = new != instance._catalog_snapshot
+    instance._catalog_snapshot = new
+    if changed and Package.objects.filter(created_by=instance).exists():
+        transaction.on_commit(lambda: cache.invalidate(cache.PACKAGES))
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, update_fields=None, **kwargs):
+    # User trong cache xác thực phải phản ánh is_active/role mới nhất
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    authentication.forget_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=authentication.AccessToken)
+def forget_access_token(sender, instance, **kwargs):
+    # Thu hồi (revoke) xóa token; đổi hạn/scope thì lưu lại token
+    authentication.forget_tokens(instance.token)
+
+
+# Điểm PT: chụp lại đóng góp khi nạp dòng, rồi áp dụng phần chênh lệch khi lưu/xóa
+
+
+@receiver(post_init, sender=Comment)
+@receiver(post_init, sender=Review)
+def snapshot_rating(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._rating_snapshot = None
+    elif ratings.RATED_FIELDS[sender] & instance.get_deferred_fields():
+        instance._rating_snapshot = _UNKNOWN
+    else:
+        instance._rating_snapshot = ratings.contribution(instance)
+
+
+@receiver(pre_save, sender=Comment)
+@receiver(pre_save, sender=Review)
+def load_unknown_rating(sender, instance, **kwargs):
+    if getattr(instance, '_rating_snapshot', _UNKNOWN) is _UNKNOWN:
+        old = sender.objects.filter(pk=instance.pk).first() if instance.pk else None
+        instance._rating_snapshot = ratings.contribution(old) if old else None
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    new = ratings.contribution(instance)
+    ratings.apply_change(None if created else instance._rating_snapshot, new)
+    instance._rating_snapshot = new
+
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    snapshot = getattr(instance, '_rating_snapshot', _UNKNOWN)
+    ratings.apply_change(ratings.contribution(instance) if snapshot is _UNKNOWN else snapshot, None)
+
+
+# Bộ đếm notification chưa đọc: chụp (user_id, is_read) khi nạp dòng để tính chênh lệch khi lưu.
+# Xóa được xử lý ở nơi gọi (notifications.on_deleted) để purge vẫn dùng được DELETE trực tiếp.
+def _unread_owner(instance):
+    return None if instance.is_read else instance.user_id
+
+
+@receiver(post_init, sender=Notification)
+def snapshot_unread(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._unread_snapshot = None
+    elif {'user_id', 'is_read'} & instance.get_deferred_fields():
+        instance._unread_snapshot = _UNKNOWN
+    else:
+        instance._unread_snapshot = _unread_owner(instance)
+
+
+@receiver(pre_save, sender=Notification)
+def load_unknown_unread(sender, instance, **kwargs):
+    if getattr(instance, '_unread_snapshot', _UNKNOWN) is _UNKNOWN:
+        old = sender.objects.filter(pk=instance.pk).first() if instance.pk else None
+        instance._unread_snapshot = _unread_owner(old) if old else None
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_on_save(sender, instance, created, **kwargs):
+    old = None if created else instance._unread_snapshot
+    new = _unread_owner(instance)
+    if old != new:
+        if old is not None:
+            notifications.adjust_unread([old], -1)
+        if new is not None:
+            notifications.adjust_unread([new], 1)
+    instance._unread_snapshot = new
+
+
+# Bảng tổng hợp báo cáo: cùng cách chụp đóng góp như điểm PT
+ROLLUPS = {
+    Payment: (reporting.PAYMENT_FIELDS, reporting.payment_contribution, reporting.apply_payment_change),
+    MemberPackage: (reporting.MEMBERSHIP_FIELDS, reporting.membership_events, reporting.apply_membership_change),
+}
+
+
+@receiver(post_init, sender=Payment)
+@receiver(post_init, sender=MemberPackage)
+def snapshot_rollup(sender, instance, **kwargs):
+    fields, contribution, _ = ROLLUPS[sender]
+    if instance.pk is None:
+        instance._rollup_snapshot = None
+    elif fields & instance.get_deferred_fields():
+        instance._rollup_snapshot = _UNKNOWN
+    else:
+        instance._rollup_snapshot = contribution(instance)
+
+
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=MemberPackage)
+def load_unknown_rollup(sender, instance, **kwargs):
+    if getattr(instance, '_rollup_snapshot', _UNKNOWN) is _UNKNOWN:
+        old = sender.objects.filter(pk=instance.pk).first() if instance.pk else None
+        instance._rollup_snapshot = ROLLUPS[sender][1](old) if old else None
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=MemberPackage)
+def update_rollup_on_save(sender, instance, created, **kwargs):
+    _, contribution, apply_change = ROLLUPS[sender]
+    new = contribution(instance)
+    apply_change(None if created else instance._rollup_snapshot, new)
+    instance._rollup_snapshot = new
+
+
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=MemberPackage)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    _, contribution, apply_change = ROLLUPS[sender]
+    snapshot = getattr(instance, '_rollup_snapshot', _UNKNOWN)
+    apply_change(contribution(instance) if snapshot is _UNKNOWN else snapshot, None)
+
+
+# Chỉ mục tìm kiếm: đánh lại token của đối tượng khi lưu, xóa token khi xóa
+@receiver(post_save, sender=PtProfile)
+@receiver(post_save, sender=Package)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Message)
+def update_search_index(sender, instance, created, **kwargs):
+    search.index_objects(search.KIND_OF_MODEL[sender], [instance], replace=not created)
+
+
+@receiver(post_delete, sender=PtProfile)
+@receiver(post_delete, sender=Package)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Message)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_objects(search.KIND_OF_MODEL[sender], [instance.pk])
@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import notifications, reporting
+from .models import User, MemberPackage, Notification
+
+
+# Các job nền chạy định kỳ (cron hoặc management command --loop)
+
+def expire_memberships(chunk_size=1000, on_progress=None):
+    """Chuyển mọi MemberPackage quá hạn sang 'expired' bằng một câu UPDATE cho mỗi chunk.
+
+    Truy vấn dùng index (status, end_date) nên chỉ chạm tới các dòng cần cập nhật.
+    """
+    today = timezone.localdate()
+    overdue = MemberPackage.objects.filter(status='active', end_date__lt=today)
+    total = 0
+    while True:
+        with transaction.atomic():
+            # Khóa các dòng còn active: request khác không hủy/sửa được giữa lúc chọn và UPDATE,
+            # nên ids đúng là các dòng được chuyển và báo cáo chỉ cộng đúng các dòng đó
+            ids = list(overdue.select_for_update().order_by().values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            total += MemberPackage.objects.filter(pk__in=ids).update(status='expired', updated_at=timezone.now())
+            reporting.record_expired(ids)
+        if on_progress:
+            on_progress(total)
+    return total
+
+
+AUDIENCES = ('all_members', 'package', 'pt_clients')
+
+
+def audience_ids(audience, package_id=None, pt_id=None):
+    """Queryset id người nhận theo nhóm: mọi hội viên, hội viên có gói đang active, hoặc khách của một PT."""
+    users = User.objects.filter(is_active=True)
+    if audience == 'all_members':
+        users = users.filter(role='member')
+    elif audience == 'package':
+        users = users.filter(member_packages__package_id=package_id, member_packages__status='active')
+    elif audience == 'pt_clients':
+        users = users.filter(schedules__pt_id=pt_id)
+    else:
+        raise ValueError(f'Unknown audience: {audience}')
+    return users.order_by('pk').values_list('pk', flat=True).distinct()
+
+
+def broadcast_notifications(user_ids, title, message, type, chunk_size=2000, progress=None):
+    """Tạo Notification cho mọi id trong user_ids bằng bulk_create theo chunk.
+
+    Mỗi chunk là một transaction ngắn và đọc id theo keyset nên không giữ khóa lâu trên bảng.
+    """
+    total = 0
+    last_pk = 0
+    while True:
+        ids = list(user_ids.filter(pk__gt=last_pk)[:chunk_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                [Notification(user_id=pk, title=title, message=message, type=type) for pk in ids])
+            # bulk_create không gửi post_save nên cộng bộ đếm chưa đọc ngay trong transaction này
+            notifications.adjust_unread(ids, 1)
+        total += len(ids)
+        last_pk = ids[-1]
+        if progress:
+            progress.update(total)
+    return total
@@ -1,8 +1,9 @@
 from rest_framework.routers import DefaultRouter
 from .views import UserViewSet, MemberProfileViewSet, ScheduleViewSet, ReviewViewSet, ProgressViewSet, PaymentViewSet, \
     PtProfileViewSet, CommentViewSet
-from .views import PackageViewSet, MemberPackageViewSet, NotificationViewSet, ChatViewSet, MessageViewSet
+from .views import PackageViewSet, MemberPackageViewSet, NotificationViewSet, ChatViewSet, MessageViewSet, ReportViewSet, ImportViewSet, metrics, search_view
 from django.urls import path, include
+from . import async_views
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
 router.register(r'member-profiles', MemberProfileViewSet)
@@ -13,11 +14,22 @@ router.register(r'payments', PaymentViewSet)
 router.register(r'packages', PackageViewSet)
 router.register(r'member-packages', MemberPackageViewSet)
 router.register(r'notifications', NotificationViewSet)
+router.register(r'chats', ChatViewSet)
+router.register(r'messages', MessageViewSet)
+router.register(r'reports', ReportViewSet, basename='report')
+router.register(r'imports', ImportViewSet)
 
 
 router.register(r'pt-profiles',PtProfileViewSet)
 router.register(r'comments',CommentViewSet)
 urlpatterns =  [
     path('', include(router.urls)),
+    path('metrics/', metrics, name='metrics'),
+    path('search/', search_view, name='search'),
+    # Bản async của các endpoint đọc nhiều (chạy dưới ASGI)
+    path('async/pt-profiles/', async_views.pt_profiles, name='async-pt-profiles'),
+    path('async/packages/', async_views.packages, name='async-packages'),
+    path('async/notifications/', async_views.notification_list, name='async-notifications'),
+    path('async/chats/<int:pk>/messages/', async_views.chat_messages, name='async-chat-messages'),
 ]
 
@@ -1,14 +1,62 @@
-from rest_framework import viewsets, generics, permissions, parsers, status
+import os
+import uuid
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from rest_framework import viewsets, generics, permissions, parsers, status, filters
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
 from . import serializers
-from .models import User, MemberProfile, Package, MemberPackage, Schedule, Review, Progress, Payment, Notification, Chat, Message, PtProfile,Comment
+from .models import User, MemberProfile, Package, MemberPackage, Schedule, Review, Progress, Payment, Notification, Chat, ChatParticipant, Message, PtProfile,Comment, ImportJob
 from .serializers import UserSerializer, MemberProfileSerializer, ScheduleSerializer, PackageSerializer, MemberPackageSerializer
 from .serializers import ReviewSerializer, ProgressSerializer, PaymentSerializer, NotificationSerializer, ChatSerializer, MessageSerializer
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.decorators import action
-from GymApp import perms
+from rest_framework.decorators import action, api_view, permission_classes
+from GymApp import perms, paginators, scheduling, cache, exports, analytics, realtime, chats, tasks, workers, notifications, profiling, reporting, search, importer, hashing
+from django.db import transaction
+from django.db.models import Q
+from django.conf import settings
+from django.http import StreamingHttpResponse, HttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+from .queryplans import EagerLoadingMixin
+from .cache import CatalogCacheMixin
+from .routers import ReplicaReadMixin
+
+
+def parse_query_datetime(value, name):
+    dt = parse_datetime(value) if value else None
+    if dt is None:
+        raise ValidationError({name: "Expected an ISO 8601 datetime."})
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def parse_query_date(value, name):
+    try:
+        day = parse_date(value) if value else None
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({name: "Expected a date (YYYY-MM-DD)."})
+    return day
+
+
+def history_params(params):
+    # Tham số phân trang lịch sử tin nhắn, dùng chung cho bản sync và async
+    try:
+        return {
+            'before': int(params['before']) if params.get('before') else None,
+            'after': int(params['after']) if params.get('after') else None,
+            'since': parse_query_datetime(params['since'], 'since') if params.get('since') else None,
+            'limit': int(params.get('limit', chats.DEFAULT_HISTORY_LIMIT)),
+        }
+    except ValueError:
+        raise ValidationError("'before', 'after' and 'limit' must be integers.")
+
+
 class UserViewSet(viewsets.ViewSet, generics.CreateAPIView):
     queryset = User.objects.filter(is_active=True)
     serializer_class = serializers.UserSerializer
@@ -24,7 +72,7 @@ class UserViewSet(viewsets.ViewSet, generics.CreateAPIView):
                 if key in ['first_name', 'last_name']:
                     setattr(u, key, request.data[key])
                 elif key.__eq__('password'):
-                    u.set_password(request.data[key])
+                    hashing.set_password(u, request.data[key])
 
             u.save()
             return Response(serializers.UserSerializer(u).data)
@@ -56,7 +104,8 @@ class MemberProfileViewSet(viewsets.ViewSet, generics.CreateAPIView):
         return MemberProfile.objects.filter(user=self.request.user)
 
 
-class PackageViewSet(viewsets.ModelViewSet):
+class PackageViewSet(ReplicaReadMixin, CatalogCacheMixin, EagerLoadingMixin, viewsets.ModelViewSet):
+    catalog = cache.PACKAGES
     queryset = Package.objects.all()
     serializer_class = PackageSerializer
 
@@ -68,9 +117,10 @@ class PackageViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
-class MemberPackageViewSet(viewsets.ModelViewSet):
+class MemberPackageViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = MemberPackage.objects.all()
     serializer_class = MemberPackageSerializer
+    pagination_class = paginators.MemberPackageCursorPaginator
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -81,9 +131,10 @@ class MemberPackageViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
+    pagination_class = paginators.ScheduleCursorPaginator
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -95,22 +146,52 @@ class ScheduleViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         if self.request.user.role == 'pt':
-            serializer.save(pt=self.request.user)
+            scheduling.book(serializer, pt=self.request.user)
         else:
-            serializer.save(user=self.request.user)
+            scheduling.book(serializer, user=self.request.user)
 
     def perform_update(self, serializer):
         instance = self.get_object()
         if self.request.user.role == 'pt':
-            serializer.save()
+            scheduling.book(serializer)
         elif self.request.user == instance.user:
-            serializer.save(status='pending')  # Hội viên cập nhật thì status về pending
+            scheduling.book(serializer, status='pending')  # Hội viên cập nhật thì status về pending
         else:
             raise ValidationError("You do not have permission to update this schedule.")
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    @action(methods=['post'], detail=False, url_path='bulk-approve')
+    def bulk_approve(self, request):
+        user = request.user
+        if not user.is_superuser and user.role != 'pt':
+            raise ValidationError("Only PTs can approve schedules.")
+        s = serializers.ScheduleBulkApproveSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        ids = s.validated_data['ids']
+
+        approved = scheduling.approve_schedules(ids, pt=None if user.is_superuser else user)
+        approved_ids = set(approved)
+        skipped = [pk for pk in ids if pk not in approved_ids]
+        return Response({'approved': approved, 'skipped': skipped})
+
+    @action(methods=['get'], detail=False, url_path='free-slots')
+    def free_slots(self, request):
+        try:
+            pt_id = int(request.query_params.get('pt', ''))
+        except ValueError:
+            raise ValidationError("A valid 'pt' id is required.")
+        pt = User.objects.filter(pk=pt_id, role='pt').first()
+        if pt is None:
+            raise ValidationError("A valid 'pt' id is required.")
+        start = parse_query_datetime(request.query_params.get('start'), 'start')
+        end = parse_query_datetime(request.query_params.get('end'), 'end')
+
+        slots = scheduling.free_slots(pt, start, end)
+        return Response([{'start_time': s, 'end_time': e} for s, e in slots])
+
+class ReviewViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Review.objects.filter()
     serializer_class = serializers.ReviewSerializer
+    pagination_class = paginators.ReviewCursorPaginator
 
 
 
@@ -134,9 +215,10 @@ class ReviewViewSet(viewsets.ModelViewSet):
             raise ValidationError("You can only update your own reviews.")
         serializer.save()
 
-class ProgressViewSet(viewsets.ModelViewSet):
+class ProgressViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Progress.objects.all()
     serializer_class = ProgressSerializer
+    pagination_class = paginators.ProgressCursorPaginator
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -157,16 +239,63 @@ class ProgressViewSet(viewsets.ModelViewSet):
             raise ValidationError("You can only update progress records you created.")
         serializer.save()
 
+    @action(methods=['get'], detail=False, url_path='analytics')
+    def analytics(self, request):
+        params = request.query_params
+        try:
+            window = int(params.get('window', 7))
+            horizon_days = int(params.get('horizon_days', 30))
+            target_weight = float(params['target_weight']) if params.get('target_weight') else None
+            queryset = self.get_queryset()
+            if params.get('member'):
+                queryset = queryset.filter(user_id=int(params['member']))
+        except ValueError:
+            raise ValidationError("'member', 'window', 'horizon_days' and 'target_weight' must be numbers.")
+        # Admin thấy toàn bộ Progress: bắt buộc chọn một hội viên để không nạp cả bảng vào NumPy
+        if request.user.is_superuser and not params.get('member'):
+            raise ValidationError({'member': "Required for admins."})
+        if not 1 <= window <= 365 or not 0 <= horizon_days <= 3650:
+            raise ValidationError("'window' must be 1-365 and 'horizon_days' 0-3650.")
+
+        user = request.user
+        scope = 'all' if user.is_superuser else f'{user.role}{user.pk}'
+        return Response(analytics.member_analytics(queryset, scope, window, horizon_days, target_weight))
+
+    @action(methods=['get'], detail=False, url_path='export')
+    def export(self, request):
+        # Dùng tham số "output" vì "format" đã được DRF dành cho content negotiation
+        output = request.query_params.get('output', 'csv')
+        if output not in exports.available_formats():
+            raise ValidationError({'output': f"Expected one of: {', '.join(exports.available_formats())}."})
+        params = request.query_params
+        try:
+            queryset = exports.filter_progress(
+                self.get_queryset(),
+                member=params.get('member'),
+                pt=params.get('pt'),
+                start=parse_query_datetime(params['from'], 'from') if params.get('from') else None,
+                end=parse_query_datetime(params['to'], 'to') if params.get('to') else None,
+            )
+        except ValueError:
+            raise ValidationError("'member' and 'pt' must be user ids.")
+
+        response = StreamingHttpResponse(exports.stream_progress(queryset, output),
+                                         content_type=exports.CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="progress.{output}"'
+        return response
+
 
 class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
+    pagination_class = paginators.PaymentCursorPaginator
     permission_classes = [IsAuthenticated]
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    pagination_class = paginators.NotificationCursorPaginator
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -176,29 +305,162 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return Notification.objects.all()
         return Notification.objects.filter(user=user)
 
-class ChatViewSet(viewsets.ModelViewSet):
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            notifications.on_deleted([instance])
+
+    # Các thao tác hàng loạt luôn chỉ áp dụng cho notification của chính người gọi (kể cả admin)
+    @action(methods=['get'], detail=False, url_path='unread-count')
+    def unread_count(self, request):
+        return Response({'unread': notifications.unread_count(request.user)})
+
+    @action(methods=['post'], detail=False, url_path='mark')
+    def mark(self, request):
+        s = serializers.NotificationMarkSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        changed = notifications.set_read_state(request.user, s.validated_data['ids'], s.validated_data['is_read'])
+        return Response({'updated': changed, 'unread': notifications.unread_count(request.user)})
+
+    @action(methods=['post'], detail=False, url_path='mark-all-read')
+    def mark_all_read(self, request):
+        before = request.data.get('before')
+        changed = notifications.mark_all_read(request.user,
+                                              before=parse_query_datetime(before, 'before') if before else None)
+        return Response({'updated': changed, 'unread': notifications.unread_count(request.user)})
+
+    @action(methods=['post'], detail=False, url_path='purge')
+    def purge(self, request):
+        s = serializers.NotificationPurgeSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        deleted = notifications.purge(request.user, s.validated_data['older_than_days'])
+        return Response({'deleted': deleted, 'unread': notifications.unread_count(request.user)})
+
+    @action(methods=['post'], detail=False, url_path='broadcast', permission_classes=[IsAdminUser])
+    def broadcast(self, request):
+        s = serializers.BroadcastSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        data = s.validated_data
+        package, pt = data.get('package_id'), data.get('pt_id')
+        user_ids = tasks.audience_ids(data['audience'], package_id=package and package.pk, pt_id=pt and pt.pk)
+
+        job_id = workers.submit('broadcast', tasks.broadcast_notifications, user_ids,
+                                data['title'], data['message'], data['type'], total=user_ids.count())
+        return Response(workers.get_job(job_id), status=status.HTTP_202_ACCEPTED)
+
+    @action(methods=['get'], detail=False, url_path=r'broadcast/(?P<job_id>[0-9a-f]{32})',
+            permission_classes=[IsAdminUser])
+    def broadcast_status(self, request, job_id=None):
+        job = workers.get_job(job_id)
+        if job is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+
+class ChatViewSet(EagerLoadingMixin, viewsets.ViewSet, generics.ListCreateAPIView, generics.RetrieveAPIView):
+    # Không cho sửa/xóa chat qua API (kể cả nhóm): chỉ xem, tạo và các action inbox/read/messages
     queryset = Chat.objects.all()
     serializer_class = ChatSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        # Chỉ thấy các chat mà mình tham gia (trừ admin)
+        if self.request.user.is_superuser:
+            return Chat.objects.all()
+        return Chat.objects.filter(participants__user=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return serializers.ChatListSerializer
+        return ChatSerializer
+
+    def perform_create(self, serializer):
+        users = {self.request.user, *serializer.validated_data.pop('participant_ids', [])}
+        with transaction.atomic():
+            chat = serializer.save()
+            ChatParticipant.objects.bulk_create([ChatParticipant(chat=chat, user=user) for user in users])
+
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        paginator = paginators.InboxCursorPaginator()
+        page = paginator.paginate_queryset(chats.inbox(request.user), request, view=self)
+        return paginator.get_paginated_response(serializers.InboxSerializer(page, many=True).data)
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        participant = ChatParticipant.objects.filter(chat_id=pk, user=request.user).first()
+        if participant is None:
+            raise ValidationError("You are not a participant of this chat.")
+        s = serializers.ChatReadSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        message = None
+        if s.validated_data.get('message_id'):
+            message = Message.objects.filter(pk=s.validated_data['message_id'], chat_id=pk).first()
+            if message is None:
+                raise ValidationError({'message_id': "Message does not exist in this chat."})
+        chats.mark_read(participant, message)
+        return Response(serializers.InboxSerializer(participant).data)
+
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
         chat = self.get_object()
-        messages = chat.messages.all().order_by('-timestamp')
-        serializer = MessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        messages, has_more = chats.message_history(chat.messages.select_related('sender'),
+                                                   **history_params(request.query_params))
+        return Response({'results': MessageSerializer(messages, many=True).data, 'has_more': has_more})
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Message.objects.all()
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        if self.request.user.is_superuser:
+            return Message.objects.all()
+        return Message.objects.filter(chat__participants__user=self.request.user)
+
+    def get_permissions(self):
+        # Chỉ người gửi được sửa/xóa tin nhắn của mình
+        if self.action in ['update', 'partial_update', 'destroy']:
+            return [perms.IsMessageSender()]
+        return [IsAuthenticated()]
+
+    def check_participant(self, chat):
+        if not chat.participants.filter(user=self.request.user).exists():
+            raise ValidationError("You are not a participant of this chat.")
+
     def perform_create(self, serializer):
-        serializer.save(sender=self.request.user)
+        self.check_participant(serializer.validated_data['chat'])
+        with transaction.atomic():
+            message = serializer.save(sender=self.request.user)
+            chats.record_messages([message])
+        realtime.publish_messages([message])
+
+    def perform_update(self, serializer):
+        self.check_participant(serializer.instance.chat)
+        with transaction.atomic():
+            message = serializer.save()
+            chats.refresh_last_message(message.chat_id)
+
+    def perform_destroy(self, instance):
+        self.check_participant(instance.chat)
+        chats.delete_message(instance)
 
-class PtProfileViewSet(viewsets.ViewSet,generics.ListAPIView, generics.RetrieveAPIView):
+class PtProfileViewSet(ReplicaReadMixin, CatalogCacheMixin, viewsets.ViewSet,generics.ListAPIView, generics.RetrieveAPIView):
+    catalog = cache.PT_PROFILES
     queryset = PtProfile.objects.filter()
     serializer_class = serializers.PtProfileSerializer
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['total_rating', 'rating_count']
+    ordering = ['-pk']  # pk thay vì id: id là OneToOne tới User nên cursor sẽ nạp User và mã hóa username
+
+    def get_queryset(self):
+        queryset = self.queryset
+        min_rating = self.request.query_params.get('min_rating')
+        if min_rating:
+            try:
+                queryset = queryset.filter(total_rating__gte=Decimal(min_rating))
+            except InvalidOperation:
+                raise ValidationError({'min_rating': "Expected a number."})
+        return queryset
 
     def get_permissions(self):
         if self.action in ['get_reviews'] and self.request.method.__eq__('POST'):
@@ -222,8 +484,116 @@ class PtProfileViewSet(viewsets.ViewSet,generics.ListAPIView, generics.RetrieveA
             return Response(serializers.CommentSerializer(c).data, status=status.HTTP_201_CREATED)
         else:
             comments = self.get_object().comment_set.select_related('user').filter(active=True)
-            return Response(serializers.CommentSerializer(comments, many=True).data, status=status.HTTP_200_OK)
+            paginator = paginators.CommentCursorPaginator()
+            page = paginator.paginate_queryset(comments, request, view=self)
+            return paginator.get_paginated_response(serializers.CommentSerializer(page, many=True).data)
 class CommentViewSet(viewsets.ViewSet, generics.DestroyAPIView, generics.UpdateAPIView):
     queryset = Comment.objects.filter(active=True)
     serializer_class = serializers.CommentSerializer
-    permission_classes = [perms.IsCommentOwner]
\ No newline at end of file
+    permission_classes = [perms.IsCommentOwner]
+
+
+class ReportViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    # Báo cáo đọc từ bảng tổng hợp theo ngày (GymApp/reporting.py), không quét Payment/MemberPackage
+    permission_classes = [IsAdminUser]
+    replica_actions = ('revenue', 'memberships')
+
+    def _date_range(self, request):
+        start = parse_query_date(request.query_params.get('from'), 'from')
+        end = parse_query_date(request.query_params.get('to'), 'to')
+        if end < start:
+            raise ValidationError("'to' must not be before 'from'.")
+        if (end - start).days >= reporting.MAX_REPORT_DAYS:
+            raise ValidationError(f"Date range cannot exceed {reporting.MAX_REPORT_DAYS} days.")
+        return start, end
+
+    def _package(self, request):
+        package = request.query_params.get('package')
+        if package and not package.isdigit():
+            raise ValidationError({'package': "Expected a package id."})
+        return package
+
+    @action(detail=False, methods=['get'])
+    def revenue(self, request):
+        start, end = self._date_range(request)
+        group_by = [g for g in request.query_params.get('group_by', 'date').split(',') if g]
+        if not group_by or set(group_by) - set(reporting.REVENUE_GROUPS):
+            raise ValidationError({'group_by': f"Expected a comma-separated subset of: {', '.join(reporting.REVENUE_GROUPS)}."})
+        return Response(reporting.revenue_report(start, end, group_by,
+                                                 package=self._package(request),
+                                                 method=request.query_params.get('method')))
+
+    @action(detail=False, methods=['get'])
+    def memberships(self, request):
+        start, end = self._date_range(request)
+        return Response(reporting.membership_report(start, end, package=self._package(request)))
+
+
+class ImportViewSet(viewsets.ViewSet, generics.ListAPIView, generics.RetrieveAPIView):
+    # Upload CSV rồi import ở thread nền (GymApp/importer.py); tiến độ đọc từ ImportJob
+    queryset = ImportJob.objects.select_related('created_by').order_by('-id')
+    serializer_class = serializers.ImportJobSerializer
+    permission_classes = [IsAdminUser]
+    parser_classes = [parsers.MultiPartParser]
+
+    def _start(self, job):
+        workers.submit('import', importer.run_job, job.pk)
+        return Response(serializers.ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    def create(self, request):
+        s = serializers.ImportUploadSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        upload = s.validated_data['file']
+        os.makedirs(settings.IMPORT_DIR, exist_ok=True)
+        path = os.path.join(settings.IMPORT_DIR, f'{uuid.uuid4().hex}.csv')
+        with open(path, 'wb') as f:
+            for piece in upload.chunks():
+                f.write(piece)
+        job = ImportJob.objects.create(kind=s.validated_data['kind'], source=path, created_by=request.user)
+        return self._start(job)
+
+    @action(methods=['post'], detail=True, url_path='resume')
+    def resume(self, request, pk=None):
+        job = self.get_object()
+        # Job đang chạy lưu checkpoint sau mỗi chunk; pending/running mà lâu không cập nhật là job bị mất
+        # khi worker khởi động lại (thread pool trong bộ nhớ) nên cũng cho chạy tiếp
+        stale_before = timezone.now() - timedelta(seconds=settings.IMPORT_STALE_SECONDS)
+        resumable = Q(status='failed') | Q(status__in=['pending', 'running'], updated_at__lt=stale_before)
+        if not ImportJob.objects.filter(resumable, pk=job.pk).exists():
+            raise ValidationError("Only failed or stalled imports can be resumed.")
+        # Chuyển sang pending ngay để hai request resume cùng lúc không chạy trùng job
+        now = timezone.now()
+        if not ImportJob.objects.filter(resumable, pk=job.pk).update(status='pending', updated_at=now):
+            raise ValidationError("Import is already being resumed.")
+        job.status, job.updated_at = 'pending', now
+        return self._start(job)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_view(request):
+    params = request.query_params
+    kinds = [k for k in params.get('type', '').split(',') if k] or list(search.DOCUMENTS)
+    if set(kinds) - set(search.DOCUMENTS):
+        raise ValidationError({'type': f"Expected a comma-separated subset of: {', '.join(search.DOCUMENTS)}."})
+    try:
+        page = int(params.get('page', 1))
+        page_size = min(int(params.get('page_size', 20)), 50)
+    except ValueError:
+        raise ValidationError("'page' and 'page_size' must be integers.")
+    if not 1 <= page <= search.MAX_PAGE or page_size < 1:
+        raise ValidationError(f"'page' must be 1-{search.MAX_PAGE} and 'page_size' positive.")
+
+    results, has_more = search.search(request.user, params.get('q', ''), kinds, page, page_size)
+    return Response({'results': results, 'page': page, 'has_more': has_more})
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    # Số liệu của process đang phục vụ request; ?output=json để xem dạng JSON
+    sample_rate = settings.PROFILING_SAMPLE_RATE
+    if request.query_params.get('output') == 'json':
+        return Response(profiling.render_json(profiling.registry, sample_rate))
+    return HttpResponse(profiling.render_prometheus(profiling.registry, sample_rate),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
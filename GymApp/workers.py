@@ -0,0 +1,69 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+# Hàng đợi job nền chạy trong process (thread pool); trạng thái job lưu trong cache
+# để mọi worker web đều đọc được khi dùng cache dùng chung (Redis).
+
+JOB_TIMEOUT = 60 * 60 * 24
+_executor = ThreadPoolExecutor(max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                               thread_name_prefix='gym-job')
+
+
+def _job_key(job_id):
+    return f'job:{job_id}'
+
+
+def get_job(job_id):
+    return cache.get(_job_key(job_id))
+
+
+class JobProgress:
+    def __init__(self, job_id, kind, total=None):
+        self.job_id = job_id
+        self.state = {'id': job_id, 'kind': kind, 'status': 'queued', 'total': total, 'done': 0,
+                      'rows_per_sec': 0.0, 'started_at': None, 'finished_at': None, 'error': None}
+        self.started = None
+        self.save()
+
+    def save(self):
+        cache.set(_job_key(self.job_id), self.state, JOB_TIMEOUT)
+
+    def start(self):
+        self.started = time.monotonic()
+        self.state.update(status='running', started_at=time.time())
+        self.save()
+
+    def update(self, done):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        self.state.update(done=done, rows_per_sec=round(done / elapsed, 1))
+        self.save()
+
+    def finish(self, error=None):
+        self.state.update(status='failed' if error else 'finished', finished_at=time.time(), error=error)
+        self.save()
+
+
+def submit(kind, func, *args, total=None, **kwargs):
+    """Chạy func(*args, progress=..., **kwargs) ở thread nền; trả về job id."""
+    progress = JobProgress(uuid.uuid4().hex, kind, total)
+
+    def run():
+        close_old_connections()
+        progress.start()
+        try:
+            func(*args, progress=progress, **kwargs)
+        except Exception as exc:
+            progress.finish(error=str(exc))
+            raise
+        else:
+            progress.finish()
+        finally:
+            close_old_connections()
+
+    _executor.submit(run)
+    return progress.job_id
@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'GymManagement.settings')
 
-application = get_asgi_application()
+# Khởi tạo Django trước khi import các module dùng model
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+from GymApp.realtime import TokenAuthMiddleware  # noqa: E402
+from GymApp.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': TokenAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
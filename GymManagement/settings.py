@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,11 +48,13 @@ INSTALLED_APPS = [
     'oauth2_provider',
     'drf_yasg',
     'corsheaders',
+    'channels',
 
 
 ]
 # Chỉ định model User tùy chỉnh
 AUTH_USER_MODEL = 'GymApp.User'
+AUTHENTICATION_BACKENDS = ['GymApp.authentication.PooledModelBackend']  # Kiểm tra mật khẩu trong process pool
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -61,8 +64,15 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'GymApp.middleware.ProfilingMiddleware',
+    'GymApp.middleware.HashingBusyMiddleware',
+    'GymApp.middleware.ReplicaStickinessMiddleware',
 ]
 
+# Profiling theo view (xem GymApp/middleware.py): tỉ lệ request được lấy mẫu, 0 để tắt
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0.05'))
+PROFILING_N_PLUS_ONE_THRESHOLD = 5  # Một câu SQL lặp từ ngần này lần trong một request bị coi là N+1
+
 ROOT_URLCONF = 'GymManagement.urls'
 
 TEMPLATES = [
@@ -82,6 +92,7 @@ TEMPLATES = [
 ]
 CORS_ALLOW_ALL_ORIGINS = True
 WSGI_APPLICATION = 'GymManagement.wsgi.application'
+ASGI_APPLICATION = 'GymManagement.asgi.application'
 
 
 # Database
@@ -89,13 +100,38 @@ WSGI_APPLICATION = 'GymManagement.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'gymdb',
-        'USER': 'root',
-        'PASSWORD': 'Admin@123',
-        'HOST': ''  # mặc định localhost
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.mysql'),
+        'NAME': os.environ.get('DB_NAME', 'gymdb'),
+        'USER': os.environ.get('DB_USER', 'root'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'Admin@123'),
+        'HOST': os.environ.get('DB_HOST', ''),  # mặc định localhost
+        'PORT': os.environ.get('DB_PORT', ''),
+        # Giữ kết nối giữa các request (mỗi thread một kết nối) thay vì mở/đóng mỗi request;
+        # kết nối sống tối đa DB_CONN_MAX_AGE giây và được ping lại trước khi dùng cho request mới.
+        # Chạy HTTP dưới ASGI thì đặt DB_CONN_MAX_AGE=0 và dùng pooler ngoài (ProxySQL, ...).
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
+if DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+    DATABASES['default']['OPTIONS'] = {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5'))}
+
+# Read replica (xem GymApp/routers.py): bật khi có DB_REPLICA_HOST hoặc DB_REPLICA_NAME.
+# Thử ở máy local bằng hai file SQLite, ví dụ:
+#   DB_ENGINE=django.db.backends.sqlite3 DB_NAME=primary.sqlite3 DB_REPLICA_NAME=replica.sqlite3
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['GymApp.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '5'))  # Đọc primary ngần này giây sau khi ghi
+REPLICA_HEALTH_INTERVAL = int(os.environ.get('REPLICA_HEALTH_INTERVAL', '10'))  # Giây giữa hai lần kiểm tra replica
 
 
 # Password validation
@@ -140,7 +176,7 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'oauth2_provider.contrib.rest_framework.OAuth2Authentication',
+        'GymApp.authentication.CachedOAuth2Authentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -148,12 +184,54 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',  # Đảm bảo dòng này có mặt
-    )
-    # ,
-    # 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    # 'PAGE_SIZE': 10,
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'GymApp.paginators.BaseCursorPaginator',
+    'PAGE_SIZE': 20,
 }
 """IsAuthenticated"""
+
+# Cache: mặc định dùng bộ nhớ cục bộ, đặt REDIS_URL để dùng Redis (hoặc server tương thích)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gym-cache',
+        }
+    }
+CATALOG_CACHE_TIMEOUT = 60 * 60
+AUTH_TOKEN_LOCAL_CACHE_SECONDS = 5  # TTL tối đa của cache access token khi cache không dùng chung giữa các worker
+BACKGROUND_WORKERS = 2  # Số thread chạy job nền (broadcast notification, ...)
+SCHEDULE_REMINDER_LEADS = [24 * 60, 60]  # Nhắc lịch trước giờ tập (phút)
+IMPORT_DIR = os.environ.get('IMPORT_DIR', BASE_DIR / 'imports')  # Nơi lưu file CSV upload để import
+IMPORT_STALE_SECONDS = 600  # Job pending/running không cập nhật checkpoint lâu hơn ngần này được coi là bị mất
+IMPORT_HASH_WORKERS = int(os.environ.get('IMPORT_HASH_WORKERS', '0')) or None  # None = số CPU
+# Process pool băm mật khẩu cho đăng ký/đăng nhập (GymApp/hashing.py); 0 worker = băm ngay trên thread request
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', '32'))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', '5'))
+
+# Channel layer cho chat realtime: pub/sub trong process, dùng Redis khi có REDIS_URL
+if os.environ.get('REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.environ['REDIS_URL']], 'capacity': 1000},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+            'CONFIG': {'capacity': 1000},
+        }
+    }
 OAUTH2_PROVIDER = {
     'SCOPES': {'read': 'Read scope', 'write': 'Write scope'},
     'ACCESS_TOKEN_EXPIRE_SECONDS': 3600,  # Token hết hạn sau 1 giờ